@@ -0,0 +1,34 @@
+# benchmarks/compare.py
+"""
+Compares two result files written by benchmarks/run.py, e.g. from two commits:
+
+    python -m benchmarks.compare before.json after.json
+
+Prints the median of every benchmark present in both files and the relative change.
+"""
+import argparse
+import json
+
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        report = json.load(f)
+    return {(result["name"], result["size"]): result for result in report["results"]}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args(argv)
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    print(f"{'benchmark':<32} {'size':>9} {'before ms':>12} {'after ms':>12} {'change':>8}")
+    for key in baseline:
+        if key not in candidate:
+            continue
+        name, size = key
+        before, after = baseline[key]["median_ms"], candidate[key]["median_ms"]
+        change = (after - before) / before * 100 if before else 0.0
+        print(f"{name:<32} {size if size is not None else '-':>9} {before:>12.4f} {after:>12.4f} {change:>+7.1f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/dataset.py
+# Deterministic synthetic portfolios and tasks for the benchmarks.
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from database.models import Portfolio, Task, ReminderDelivery, TaskStatusCount, ChangeLogEntry
+from database.crud import rebuild_status_counts
+
+# Same ids as the command choices in cogs/tasks.py
+PORTFOLIOS = {26: "IT", 27: "MARKETING", 28: "EVENTS"}
+STATUSES = ["Not Started", "In Progress", "Completed", "Cancelled"]
+PRIORITIES = ["Low", "Medium", "High"]
+# Deadlines are spread over this range around the reference day
+DEADLINE_PAST_DAYS = 30
+DEADLINE_FUTURE_DAYS = 90
+MAX_DESCRIPTION = 400
+INSERT_BATCH = 10_000
+
+WORDS = ("review draft budget sponsor venue poster meeting update website launch survey "
+         "report contract booking schedule feedback design social campaign workshop").split()
+
+def _text(rng: random.Random, length: int) -> str:
+    words = []
+    size = 0
+    while size < length:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:length]
+
+def populate(db: Session, size: int, today: datetime, seed: int = 0):
+    """
+    Replaces all portfolios, tasks, status counters and reminder records with `size` generated tasks.
+    The change log entries written by the triggers meanwhile are dropped again.
+    The same size, day and seed always produce the same rows.
+    """
+    rng = random.Random(seed)
+    db.query(ReminderDelivery).delete()
+    db.query(TaskStatusCount).delete()
+    db.query(Task).delete()
+    db.query(Portfolio).delete()
+    db.add_all(Portfolio(portfolio_id=pid, name=name, channel_id=str(1000 + pid)) for pid, name in PORTFOLIOS.items())
+    db.flush()
+
+    start = today - timedelta(days=DEADLINE_PAST_DAYS)
+    span_minutes = (DEADLINE_PAST_DAYS + DEADLINE_FUTURE_DAYS) * 24 * 60
+    portfolio_ids = list(PORTFOLIOS)
+    for first in range(1, size + 1, INSERT_BATCH):
+        rows = []
+        for task_id in range(first, min(first + INSERT_BATCH, size + 1)):
+            deadline = start + timedelta(minutes=rng.randrange(span_minutes))
+            rows.append({
+                "task_id": task_id,
+                "title": _text(rng, rng.randint(8, 60)),
+                "description": _text(rng, rng.randint(0, MAX_DESCRIPTION)) or None,
+                "status": rng.choice(STATUSES),
+                "priority": rng.choice(PRIORITIES),
+                "deadline": deadline,
+                "created_at": deadline - timedelta(days=rng.randint(1, 60)),
+                "updated_at": None,
+                "portfolio_id": rng.choice(portfolio_ids),
+            })
+        db.execute(insert(Task), rows)
+    db.query(ChangeLogEntry).delete()
+    db.commit()
+    rebuild_status_counts(db)
+
+def clear_reminder_ledger(db: Session):
+    db.query(ReminderDelivery).delete()
+    db.commit()
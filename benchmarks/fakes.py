@@ -0,0 +1,94 @@
+# benchmarks/fakes.py
+# Stand-ins for the discord objects the cogs touch, so commands can run without a gateway connection.
+import asyncio
+from utils.portfolio_cache import PortfolioCache, role_name_for
+
+class FakeUser:
+    id = 1
+    mention = "<@1>"
+    display_name = "benchmark"
+
+class FakeResponse:
+    def __init__(self):
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def defer(self, **kwargs):
+        self._done = True
+
+    async def send_message(self, *args, **kwargs):
+        self._done = True
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, *args, **kwargs):
+        self.sent.append(kwargs)
+
+class FakeInteraction:
+    def __init__(self, channel_id: int = 0):
+        self.user = FakeUser()
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+        self.channel_id = channel_id
+
+class FakeRole:
+    def __init__(self, name: str):
+        self.id = abs(hash(name))
+        self.name = name
+        self.mention = f"<@&{self.id}>"
+
+class FakeGuild:
+    id = 1
+
+    def __init__(self, portfolio_names: list):
+        self.roles = [FakeRole(role_name_for(name)) for name in portfolio_names]
+
+class FakeChannel:
+    def __init__(self, channel_id: int, guild: FakeGuild):
+        self.id = channel_id
+        self.guild = guild
+
+    async def send(self, content=None, embed=None, **kwargs):
+        pass
+
+class FakeNotifier:
+    """Accepts notifications and reports them delivered at once, leaving Discord's pacing out of the timings."""
+    def __init__(self):
+        self.sent = 0
+
+    def enqueue(self, channel, embed, mention: str = "", summary: str = None) -> asyncio.Future:
+        self.sent += 1
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(True)
+        return future
+
+    def queue_depth(self) -> int:
+        return 0
+
+class FakeBot:
+    def __init__(self, guild: FakeGuild):
+        self.guild = guild
+        self._channels = {}
+        self.notifier = FakeNotifier()
+        self.portfolios = PortfolioCache(self)
+
+    def get_channel(self, channel_id: int) -> FakeChannel:
+        return self._channels.setdefault(channel_id, FakeChannel(channel_id, self.guild))
+
+    def add_listener(self, func, name: str = None):
+        pass
+
+    def dispatch(self, event: str, *args):
+        pass
+
+    async def wait_until_ready(self):
+        pass
+
+async def make_bot(portfolio_names: list) -> FakeBot:
+    bot = FakeBot(FakeGuild(portfolio_names))
+    await bot.portfolios.refresh()
+    return bot
@@ -0,0 +1,83 @@
+# benchmarks/run.py
+"""
+Runs the benchmark suite and writes the results as JSON.
+
+    python -m benchmarks.run --sizes 1000,100000 --output results.json
+    python -m benchmarks.run --database-url postgresql://localhost/taskbot_bench --sizes 1000000
+
+The benchmark database is wiped and refilled for every size, so never point it at a real database.
+Without --database-url a temporary SQLite file is used.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import tempfile
+from datetime import datetime
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the task list, reminder and parsing hot paths.")
+    parser.add_argument("--sizes", default="1000,100000", help="Comma separated task counts (e.g. 1000,100000,1000000)")
+    parser.add_argument("--database-url", help="Database to fill with synthetic data (default: temporary SQLite file)")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed samples per benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the generated data")
+    parser.add_argument("--output", default="-", help="File to write the JSON results to (default: stdout)")
+    return parser.parse_args(argv)
+
+async def run(args) -> dict:
+    from benchmarks import suite
+
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    results = suite.formatting_benchmarks(args.iterations, args.seed)
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        results.extend(await suite.database_benchmarks(size, args.iterations, today, args.seed))
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": suite.database_dialect(),
+            "iterations": args.iterations,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+def main(argv=None):
+    args = parse_args(argv)
+    tmp_dir = None
+    database_url = args.database_url
+    if database_url is None:
+        tmp_dir = tempfile.TemporaryDirectory(prefix="taskbot-bench-")
+        database_url = f"sqlite:///{os.path.join(tmp_dir.name, 'bench.db')}"
+    # The database module binds its engine on import, so the URL must be set before anything imports it
+    os.environ["DATABASE_URL"] = database_url
+    # Keep slow-command traces out of the JSON on stdout
+    os.environ.setdefault("TRACE_SLOW_MS", "inf")
+
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    output = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+if __name__ == "__main__":
+    main()
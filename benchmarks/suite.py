@@ -0,0 +1,180 @@
+# benchmarks/suite.py
+# The benchmarks themselves. Imported by benchmarks/run.py once DATABASE_URL points at the benchmark database.
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from database.db import run_db, run_sync, init_db, engine
+from database import crud
+from cogs.tasks import TaskCog, TaskPageSource, format_task_entry, fit_entries
+from cogs.reminder import ReminderCog
+from utils.date_util import parse_date, _parse_spec
+from utils.formatter import format_task_list
+from benchmarks.dataset import PORTFOLIOS, populate, clear_reminder_ledger
+from benchmarks.fakes import FakeInteraction, make_bot
+from benchmarks.legacy import parse_date_strptime
+
+# Inputs for parse_date: the accepted formats plus the typical mistakes
+DATE_INPUTS = ["25/12/2025 17:30", "01/01/2026", "31/02/2026", "2026-01-01", "tomorrow", "7/3/2026 9:05"]
+# Tasks formatted per sample by the pure formatting benchmarks
+ENTRIES_PER_SAMPLE = 100
+# Tasks loaded per sample by the hydration benchmarks
+HYDRATE_ROWS = 2000
+
+def summarize(name: str, size, samples: list, ops_per_sample: int = 1) -> dict:
+    """Turns raw sample durations (seconds) into a result record; times are per operation, in milliseconds."""
+    per_op = sorted(sample / ops_per_sample * 1000 for sample in samples)
+    return {
+        "name": name,
+        "size": size,
+        "samples": len(per_op),
+        "ops_per_sample": ops_per_sample,
+        "min_ms": per_op[0],
+        "median_ms": statistics.median(per_op),
+        "mean_ms": statistics.fmean(per_op),
+        "p95_ms": per_op[min(len(per_op) - 1, int(len(per_op) * 0.95))],
+        "max_ms": per_op[-1],
+        "stdev_ms": statistics.stdev(per_op) if len(per_op) > 1 else 0.0,
+    }
+
+async def measure(name: str, size, fn, iterations: int, setup=None) -> dict:
+    """Times `await fn()` over a number of iterations after one untimed warm-up; `setup` runs untimed before each."""
+    samples = []
+    for i in range(iterations + 1):
+        if setup is not None:
+            await setup()
+        started = time.perf_counter()
+        await fn()
+        if i:
+            samples.append(time.perf_counter() - started)
+    return summarize(name, size, samples)
+
+def measure_sync(name: str, fn, iterations: int, number: int) -> dict:
+    """Times `number` calls of fn per sample, for functions too fast to time one call at a time."""
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append(time.perf_counter() - started)
+    return summarize(name, None, samples, number)
+
+def retained_bytes(fn, *args) -> int:
+    """Memory allocated by fn(*args) that is still held once it returns (e.g. by its result or a session)."""
+    tracemalloc.start()
+    try:
+        result = fn(*args)
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return retained
+
+async def database_benchmarks(size: int, iterations: int, today: datetime, seed: int) -> list:
+    started = time.perf_counter()
+    await run_sync(init_db)
+    await run_db(populate, size, today, seed)
+    print(f"Generated {size} tasks in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    bot = await make_bot(list(PORTFOLIOS.values()))
+    cog = TaskCog(bot)
+    results = []
+
+    async def check_tasks(portfolio_id=None):
+        await TaskCog.check_tasks.callback(cog, FakeInteraction(), portfolio_id)
+
+    async def clear_render_cache():
+        cog.pages.clear()
+
+    # Cold views render from the database; a repeat view of unchanged data is served from the render cache
+    results.append(await measure("check_tasks.all_portfolios", size, check_tasks, iterations, setup=clear_render_cache))
+    results.append(await measure("check_tasks.one_portfolio", size, lambda: check_tasks(26), iterations, setup=clear_render_cache))
+    results.append(await measure("check_tasks.repeat_view", size, check_tasks, iterations))
+
+    # Following "Next" from the first page exercises the keyset query with a cursor
+    counts = await run_db(crud.count_tasks_by_status, None)
+    source = TaskPageSource(bot, None, counts)
+    _, second = await source.render(source.first_position())
+
+    async def next_page():
+        await source.render(second)
+
+    results.append(await measure("task_page.next", size, next_page, iterations))
+
+    # One reminder tick from a cold schedule: load the lookahead window, then claim and send tomorrow's reminders
+    now = today.replace(hour=12)
+
+    async def reminder_tick():
+        reminders = ReminderCog(bot)
+        reminders.reminder_loop.cancel()
+        await reminders.tick(now)
+
+    results.append(await measure(
+        "reminder.tick", size, reminder_tick, iterations, setup=lambda: run_db(clear_reminder_ledger)
+    ))
+
+    # Loading a batch of tasks as ORM entities versus the column-projected rows used by the list and reminder paths
+    task_ids = list(range(1, min(size, HYDRATE_ROWS) + 1))
+    for name, load in (("hydrate.orm_tasks", crud.get_tasks), ("hydrate.list_rows", crud.get_task_rows),
+                       ("hydrate.reminder_rows", crud.get_reminder_rows)):
+        result = await measure(name, size, lambda load=load: run_db(load, task_ids), iterations)
+        result["bytes_per_row"] = await run_db(lambda db, load=load: retained_bytes(load, db, task_ids) // len(task_ids))
+        results.append(result)
+    return results
+
+def formatting_benchmarks(iterations: int, seed: int) -> list:
+    rng = random.Random(seed)
+    deadline = datetime(2026, 1, 1, 9, 0)
+
+    class Row:
+        __slots__ = ("task_id", "title", "description", "status", "priority", "deadline")
+
+        def __init__(self, task_id):
+            self.task_id = task_id
+            self.title = "Task %d" % task_id
+            self.description = "x" * rng.randint(0, 400)
+            self.status = "Not Started"
+            self.priority = "Medium"
+            self.deadline = deadline + timedelta(hours=task_id)
+
+    rows = [Row(i) for i in range(ENTRIES_PER_SAMPLE)]
+    entries = [format_task_entry(row, "IT") for row in rows]
+
+    def format_entries():
+        for row in rows:
+            format_task_entry(row, "IT")
+
+    now = datetime(2026, 1, 1, 12, 0)
+
+    def parse_dates():
+        for text in DATE_INPUTS:
+            parse_date(text, now)
+
+    def parse_dates_uncached():
+        _parse_spec.cache_clear()
+        for text in DATE_INPUTS:
+            parse_date(text, now)
+
+    def parse_dates_legacy():
+        for text in DATE_INPUTS:
+            parse_date_strptime(text)
+
+    results = [
+        measure_sync("format_task_entry", format_entries, iterations, 100),
+        measure_sync("format_task_list", lambda: format_task_list(rows), iterations, 100),
+        measure_sync("fit_entries", lambda: fit_entries(entries), iterations, 1000),
+        measure_sync("parse_date", parse_dates, iterations, 1000),
+        measure_sync("parse_date.uncached", parse_dates_uncached, iterations, 1000),
+        measure_sync("parse_date.legacy", parse_dates_legacy, iterations, 1000),
+    ]
+    # Report formatting per entry and parsing per input rather than per batch
+    for result, per_batch in zip(results, (ENTRIES_PER_SAMPLE, ENTRIES_PER_SAMPLE, 1) + (len(DATE_INPUTS),) * 3):
+        result["ops_per_sample"] *= per_batch
+        for key in ("min_ms", "median_ms", "mean_ms", "p95_ms", "max_ms", "stdev_ms"):
+            result[key] /= per_batch
+    return results
+
+def database_dialect() -> str:
+    return engine.dialect.name
@@ -1,62 +1,184 @@
+import asyncio
 import discord
 from discord.ext import tasks, commands
-from sqlalchemy.orm import Session
-from database.db import SessionLocal
-from database.models import Task, Portfolio
+from database.db import run_db
+from database.models import Task
+from database import crud
 from datetime import datetime, timedelta
+from database.ledger import claim_reminders, release_reminders, prune_reminders
+from utils.scheduler import ReminderSchedule, reminder_fire_time
+from utils.metrics import gauge
+from utils.date_util import local_now
+
+# How many days of upcoming deadlines are kept in the in-memory schedule
+LOOKAHEAD_DAYS = 7
+# Upper bound on a single sleep, so wall-clock changes (e.g. DST) are picked up
+MAX_SLEEP_SECONDS = 3600
+# Ledger key for the "due tomorrow" reminder
+REMINDER_KIND = "day_before"
+# How long delivery records are kept
+LEDGER_RETENTION = timedelta(days=30)
+# Delay before a reminder that failed to send is tried again
+RETRY_DELAY = timedelta(minutes=5)
+
+def start_of_day(day) -> datetime:
+    return datetime.combine(day, datetime.min.time())
 
 class ReminderCog(commands.Cog):
+    """
+    Sends the "due tomorrow" reminders. With several replicas running, only the one holding the
+    scheduler lease (bot.leader) keeps a schedule and sends reminders; the others stand by.
+    """
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.reminded_tasks = set()  # To avoid duplicate reminders in one day
-        self.last_date = datetime.now().date()
+        self.reset()
+        self.wakeup = asyncio.Event()
+        gauge("taskbot_reminders_scheduled", "Reminders waiting in the in-memory schedule", fn=lambda: len(self.schedule))
+        gauge("taskbot_reminders_overdue", "Scheduled reminders whose fire time has passed", fn=lambda: self.schedule.due_count(local_now()))
         self.reminder_loop.start()
 
     def cog_unload(self):
         self.reminder_loop.cancel()
 
-    @tasks.loop(minutes=60)
+    def reset(self):
+        """Forgets the schedule, so it is loaded from scratch the next time this replica sends reminders."""
+        self.schedule = ReminderSchedule()
+        self.loaded_until = None  # Deadlines before this time have been loaded into the schedule
+        self.refill_at = None  # When the next window of deadlines should be loaded
+
+    async def refill(self, now: datetime):
+        """Loads the reminders for deadlines entering the lookahead window with a single deadline-range query."""
+        tomorrow = start_of_day(now.date() + timedelta(days=1))
+        window_start = max(self.loaded_until, tomorrow) if self.loaded_until else tomorrow
+        window_end = tomorrow + timedelta(days=LOOKAHEAD_DAYS)
+
+        rows = await run_db(crud.upcoming_deadlines, window_start, window_end)
+        # Delivery records only matter while their reminder can still fire
+        await run_db(prune_reminders, now.date() - LEDGER_RETENTION)
+
+        for task_id, deadline in rows:
+            self.schedule.schedule(task_id, reminder_fire_time(deadline))
+        self.loaded_until = window_end
+        self.refill_at = tomorrow
+
+    def track(self, task_id: int, deadline: datetime):
+        """Adds, moves or drops the reminder of a single task after it was created or edited."""
+        if self.loaded_until is None:
+            # The first refill will pick the task up
+            return
+        tomorrow = start_of_day(local_now().date() + timedelta(days=1))
+        if deadline is not None and tomorrow <= deadline < self.loaded_until:
+            if self.schedule.schedule(task_id, reminder_fire_time(deadline)):
+                self.wakeup.set()
+        else:
+            self.schedule.unschedule(task_id)
+
+    @commands.Cog.listener()
+    async def on_task_created(self, task: Task):
+        self.track(task.task_id, task.deadline)
+
+    @commands.Cog.listener()
+    async def on_task_updated(self, task: Task):
+        self.track(task.task_id, task.deadline)
+
+    @commands.Cog.listener()
+    async def on_task_changed(self, task: Task, portfolio_ids: set):
+        # Deadlines set through other replicas or directly in the database arrive through the change feed
+        self.track(task.task_id, task.deadline)
+
+    @commands.Cog.listener()
+    async def on_task_deleted(self, task_id: int, portfolio_ids: set):
+        self.schedule.unschedule(task_id)
+
+    async def tick(self, now: datetime):
+        """Loads new deadlines when needed and sends the reminders that are due at `now`."""
+        if self.refill_at is None or now >= self.refill_at:
+            await self.refill(now)
+
+        due_ids = self.schedule.pop_due(now)
+        if due_ids:
+            await self.send_reminders(due_ids, now)
+
+    @tasks.loop()
     async def reminder_loop(self):
-        db: Session = SessionLocal()
-        now = datetime.now()
+        leader = self.bot.leader
+        if not leader.is_leader:
+            # Another replica sends the reminders; start from a fresh schedule if this one takes over
+            self.reset()
+            await leader.wait_until_leader()
+
+        await self.tick(local_now())
 
-        # Reset reminders if the day has changed
-        if now.date() != self.last_date:
-            self.reminded_tasks.clear()
-            self.last_date = now.date()
+        # Sleep until the next reminder is due, the next window needs loading, a new task moves the head,
+        # or this replica loses the lease
+        self.wakeup.clear()
+        next_fire = self.schedule.next_fire_time()
+        wake_at = min(next_fire, self.refill_at) if next_fire else self.refill_at
+        delay = min(max((wake_at - local_now()).total_seconds(), 0), MAX_SLEEP_SECONDS)
+        waiters = [asyncio.create_task(self.wakeup.wait()), asyncio.create_task(leader.wait_until_deposed())]
+        try:
+            await asyncio.wait(waiters, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
 
-        # Calculate tomorrow's date
+    async def send_reminders(self, task_ids: list, now: datetime):
+        tasks_due = await run_db(crud.get_reminder_rows, task_ids)
+
+        # The deadline may have changed since the task was scheduled
         tomorrow = now.date() + timedelta(days=1)
-        # Query tasks that are due tomorrow
-        tasks_due = db.query(Task).all()
         for task in tasks_due:
-            if task.deadline.date() == tomorrow and task.task_id not in self.reminded_tasks:
-                if now.hour == 9:  # Send reminders at 9:00 AM
-                    portfolio = db.query(Portfolio).filter(Portfolio.portfolio_id == task.portfolio_id).first()
-                    if portfolio:
-                        try:
-                            channel_id = int(portfolio.channel_id)
-                            channel = self.bot.get_channel(channel_id)
-                            if channel:
-                                # Attempt to fetch the role in the guild with the name "DepartmentName-portfolio"
-                                role_name = f"{portfolio.name} portfolio"
-                                role = discord.utils.get(channel.guild.roles, name=role_name)
-                                role_mention = role.mention if role else ""
-                                embed = discord.Embed(
-                                    title="⏰ Task Reminder",
-                                    description=(
-                                        f"Reminder: The task **{task.title}** (ID: {task.task_id}) is due tomorrow at "
-                                        f"{task.deadline.strftime('%d/%m/%Y %H:%M')}."
-                                    ),
-                                    color=0xe67e22
-                                )
-                                embed.set_footer(text=f"Department: {portfolio.name}")
-                                # Send the reminder message with role mention
-                                await channel.send(content=role_mention, embed=embed)
-                                self.reminded_tasks.add(task.task_id)
-                        except Exception as e:
-                            print(f"Error sending reminder: {e}")
-        db.close()
+            if task.deadline.date() != tomorrow:
+                self.track(task.task_id, task.deadline)
+        tasks_due = [task for task in tasks_due if task.deadline.date() == tomorrow]
+
+        # Reminders that cannot be routed yet are not claimed, so they are sent once the portfolio cache has a channel
+        unroutable = set()
+        for task in tasks_due:
+            portfolio = self.bot.portfolios.get(task.portfolio_id)
+            if not (portfolio and portfolio.channel):
+                unroutable.add(task.task_id)
+        if unroutable:
+            print(f"No channel for the reminders of tasks {sorted(unroutable)}, retrying in {RETRY_DELAY}")
+            for task_id in unroutable:
+                self.schedule.schedule(task_id, now + RETRY_DELAY)
+            tasks_due = [task for task in tasks_due if task.task_id not in unroutable]
+
+        # Claim all due reminders in one statement; ones already delivered (before a restart or by a previous leader) are skipped
+        claimed = await run_db(claim_reminders, REMINDER_KIND, now.date(), [task.task_id for task in tasks_due])
+        tasks_due = [task for task in tasks_due if task.task_id in claimed]
+        if not tasks_due:
+            return
+
+        # Queue every reminder first so the dispatcher can merge the ones sharing a channel
+        deliveries = {}
+        failed = []
+        for task in tasks_due:
+            portfolio = self.bot.portfolios.get(task.portfolio_id)
+            if not (portfolio and portfolio.channel):
+                # The portfolio cache changed since the check above
+                failed.append(task.task_id)
+                continue
+            embed = discord.Embed(
+                title="⏰ Task Reminder",
+                description=(
+                    f"Reminder: The task **{task.title}** (ID: {task.task_id}) is due tomorrow at "
+                    f"{task.deadline.strftime('%d/%m/%Y %H:%M')}."
+                ),
+                color=0xe67e22
+            )
+            embed.set_footer(text=f"Department: {portfolio.name}")
+            deliveries[task.task_id] = self.bot.notifier.enqueue(portfolio.channel, embed, mention=portfolio.role_mention)
+
+        results = await asyncio.gather(*deliveries.values())
+        failed += [task_id for task_id, delivered in zip(deliveries, results) if not delivered]
+
+        if failed:
+            # Release the claims so the reminders are retried shortly
+            await run_db(release_reminders, REMINDER_KIND, now.date(), failed)
+            print(f"Error sending reminders for tasks {failed}, retrying in {RETRY_DELAY}")
+            for task_id in failed:
+                self.schedule.schedule(task_id, now + RETRY_DELAY)
 
     @reminder_loop.before_loop
     async def before_reminder(self):
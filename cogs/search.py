@@ -0,0 +1,136 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+from database.db import run_db, engine
+from database.models import Task
+from database import crud, search
+from utils.formatter import STATUS_EMOJI, format_task_entry, fit_entries
+from utils.date_util import parse_date
+from utils.instrumentation import instrumented, span
+from utils.search_index import TaskSearchIndex, tokenize
+
+# Number of results shown by /search_tasks
+SEARCH_LIMIT = 10
+
+class SearchCog(commands.Cog):
+    """
+    /search_tasks over task titles and descriptions.
+    PostgreSQL is searched through its full-text and trigram indexes; on other databases an
+    in-process inverted index is loaded at startup and kept current by the task events.
+    """
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.use_database = engine.dialect.name == "postgresql"
+        self.trigram = False
+        self.index = None     # TaskSearchIndex once loaded (in-process mode only)
+        self._pending = []    # Tasks created or edited while the index was loading
+
+    async def cog_load(self):
+        if self.use_database:
+            self.trigram = await run_db(search.has_trigram)
+            return
+        index = TaskSearchIndex()
+        await run_db(lambda db: index.load(search.iter_search_rows(db)))
+        for task in self._pending:
+            index.update(task)
+        self._pending.clear()
+        self.index = index
+        print(f"Search index loaded with {len(index)} tasks")
+
+    def _track(self, task: Task):
+        if self.use_database:
+            return
+        if self.index is None:
+            self._pending.append(task)
+        else:
+            self.index.update(task)
+
+    @commands.Cog.listener()
+    async def on_task_created(self, task: Task):
+        self._track(task)
+
+    @commands.Cog.listener()
+    async def on_task_updated(self, task: Task):
+        self._track(task)
+
+    @commands.Cog.listener()
+    async def on_task_changed(self, task: Task, portfolio_ids: set):
+        self._track(task)
+
+    @commands.Cog.listener()
+    async def on_task_deleted(self, task_id: int, portfolio_ids: set):
+        if self.index is not None:
+            self.index.remove(task_id)
+
+    @app_commands.command(name="search_tasks", description="Search tasks by words in their title or description")
+    @app_commands.describe(
+        query="Words to look for; partial words match too",
+        portfolio_id="Optional: Only tasks of this portfolio",
+        status="Optional: Only tasks with this status",
+        due_after="Optional: Only tasks due on or after this date (DD/MM/YYYY, \"today\", \"+7d\", ...)",
+        due_before="Optional: Only tasks due before this date (DD/MM/YYYY, \"next fri\", \"+7d\", ...)"
+    )
+    @app_commands.choices(
+        portfolio_id=[
+            app_commands.Choice(name="IT", value=26),
+            app_commands.Choice(name="MARKETING", value=27),
+            app_commands.Choice(name="EVENTS", value=28)
+        ],
+        status=[
+            app_commands.Choice(name="Not Started", value="Not Started"),
+            app_commands.Choice(name="In Progress", value="In Progress"),
+            app_commands.Choice(name="Completed", value="Completed"),
+            app_commands.Choice(name="Cancelled", value="Cancelled")
+        ]
+    )
+    @instrumented
+    async def search_tasks(self, interaction: discord.Interaction, query: str, portfolio_id: int = None,
+                           status: str = None, due_after: str = None, due_before: str = None):
+        terms = tokenize(query)
+        if not terms:
+            await interaction.response.send_message("Error: The query must contain at least one word.", ephemeral=True)
+            return
+        after_dt = parse_date(due_after) if due_after else None
+        before_dt = parse_date(due_before) if due_before else None
+        if (due_after and after_dt is None) or (due_before and before_dt is None):
+            await interaction.response.send_message("Error: Dates should be DD/MM/YYYY, DD/MM/YYYY HH:MM or a relative date such as \"+7d\"", ephemeral=True)
+            return
+        if not self.use_database and self.index is None:
+            await interaction.response.send_message("The search index is still loading, please try again shortly.", ephemeral=True)
+            return
+
+        with span("defer"):
+            await interaction.response.defer(ephemeral=True, thinking=True)
+
+        if self.use_database:
+            results = await run_db(
+                search.search_tasks, terms, portfolio_id, status, after_dt, before_dt, SEARCH_LIMIT, self.trigram
+            )
+        else:
+            with span("search"):
+                task_ids = self.index.search(query, portfolio_id, status, after_dt, before_dt, SEARCH_LIMIT)
+            tasks_by_id = {task.task_id: task for task in await run_db(crud.get_task_rows, task_ids)} if task_ids else {}
+            results = [tasks_by_id[task_id] for task_id in task_ids if task_id in tasks_by_id]
+
+        if not results:
+            await interaction.followup.send(f"No tasks match \"{query}\".", ephemeral=True)
+            return
+
+        with span("render"):
+            entries = [
+                f"{STATUS_EMOJI.get(task.status, '')} "
+                + format_task_entry(task, None if portfolio_id else self.bot.portfolios.name(task.portfolio_id))
+                for task in results
+            ]
+            text, used = fit_entries(entries, 4096)
+            embed = discord.Embed(
+                title=f"🔎 Search: {query}"[:256],
+                description=text,
+                color=0x9b59b6
+            )
+            embed.set_footer(text=f"Showing {used} best match(es)")
+        with span("discord"):
+            await interaction.followup.send(embed=embed, ephemeral=True)
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(SearchCog(bot))
@@ -1,19 +1,16 @@
+from collections import Counter
 import discord
 from discord import app_commands
 from discord.ext import commands
-from sqlalchemy.orm import Session
-from database.db import SessionLocal
-from database.models import Task, Portfolio
-from datetime import datetime
+from config import RENDER_CACHE_MB
+from database.db import run_db
+from database import crud
 from utils.date_util import parse_date
-
-# Mapping status to emoji
-STATUS_EMOJI = {
-    "Not Started": "⏳",
-    "In Progress": "▶️",
-    "Completed": "✅",
-    "Cancelled": "❌"
-}
+from utils.formatter import STATUS_EMOJI, FIELD_LIMIT, format_task_entry, fit_entries
+from utils.instrumentation import instrumented, span
+from utils.render_cache import RenderCache, DataVersions
+from utils.task_import import validate_file, MAX_IMPORT_BYTES
+from utils.task_lookup import TaskPrefixIndex
 
 # Mapping status to button style
 BUTTON_STYLE = {
@@ -23,19 +20,87 @@ BUTTON_STYLE = {
     "Cancelled": discord.ButtonStyle.danger          # Red
 }
 
-# Helper function: split long text into parts not exceeding max_length
-def split_text(text: str, max_length: int = 1024):
-    return [text[i:i+max_length] for i in range(0, len(text), max_length)]
+# Fixed status order used by the task list.
+STATUSES_ORDER = ["Not Started", "In Progress", "Completed", "Cancelled"]
+
+# Maximum number of tasks fetched for one page; fewer are shown if their entries do not fit.
+PAGE_ROWS = 10
+# Most tasks a single /bulk_edit_tasks may change
+MAX_BULK_EDIT = 1000
+
+class TaskPageSource:
+    """
+    Fetches and renders a single page of the task list at a time.
+    A page position is (status, page number, key), where key is the (deadline, task_id) of the
+    last task on the previous page of that status, or None for the first page.
+    With a cache, rendered pages are stored under the data version the source was created at.
+    """
+    def __init__(self, bot: commands.Bot, portfolio_id: int, status_counts: dict,
+                 cache: RenderCache = None, version=None):
+        self.bot = bot
+        self.portfolio_id = portfolio_id
+        self.status_counts = status_counts
+        self.statuses = [status for status in STATUSES_ORDER if status_counts.get(status)]
+        self.cache = cache
+        self.version = version
+
+    def first_position(self, status: str = None):
+        return (status or self.statuses[0], 1, None)
+
+    def next_status(self, status: str):
+        index = self.statuses.index(status)
+        return self.statuses[index + 1] if index + 1 < len(self.statuses) else None
+
+    async def render(self, position):
+        """Returns (embed, position of the following page or None)."""
+        key = ("page", self.portfolio_id, position, self.version)
+        cached = self.cache.get(key) if self.cache is not None else None
+        if cached is not None:
+            embed_data, next_position = cached
+            return discord.Embed.from_dict(embed_data), next_position
+
+        status, page_no, after = position
+        # One extra row tells whether another page follows within this status
+        rows = await run_db(crud.fetch_task_page, status, self.portfolio_id, after, PAGE_ROWS + 1)
+        has_more = len(rows) > PAGE_ROWS
+        rows = rows[:PAGE_ROWS]
+        with span("render"):
+            entries = [
+                format_task_entry(task, None if self.portfolio_id else self.bot.portfolios.name(task.portfolio_id))
+                for task in rows
+            ]
+            text, used = fit_entries(entries)
+
+            embed = discord.Embed(title="📋 Task List", color=0x9b59b6)
+            if self.portfolio_id:
+                embed.description = f"Tasks for **{self.bot.portfolios.name(self.portfolio_id)}** department."
+            else:
+                embed.description = "Tasks for **all departments**."
+            embed.add_field(
+                name=f"{STATUS_EMOJI.get(status, '')} {status} (Page {page_no}, {self.status_counts.get(status, 0)} tasks)",
+                value=text or "No tasks.",
+                inline=False
+            )
+
+        if used < len(rows) or has_more:
+            last = rows[used - 1]
+            next_position = (status, page_no + 1, (last.deadline, last.task_id))
+        else:
+            following = self.next_status(status)
+            next_position = self.first_position(following) if following else None
+        if self.cache is not None:
+            self.cache.put(key, (embed.to_dict(), next_position))
+        return embed, next_position
 
 # Paginator view with jump buttons using emoji and count on labels.
+# Only the page being shown is kept; earlier positions are remembered so "Previous" can go back.
 class TaskPaginator(discord.ui.View):
-    def __init__(self, pages: list, author: discord.User, status_jump: dict, status_counts: dict):
+    def __init__(self, source: TaskPageSource, author: discord.User, next_position):
         super().__init__(timeout=180)
-        self.pages = pages
-        self.current = 0
+        self.source = source
         self.author = author
-        self.status_jump = status_jump  # Mapping from status to the first page index for that status
-        self.status_counts = status_counts  # Mapping from status to count
+        self.history = [source.first_position()]  # Positions of the pages viewed so far, current last
+        self.next_position = next_position
 
         # Row 0: Previous and Next buttons.
         prev_button = discord.ui.Button(label="Previous", style=discord.ButtonStyle.primary, row=0)
@@ -46,30 +111,33 @@ class TaskPaginator(discord.ui.View):
         self.add_item(next_button)
 
         # Row 1: Jump buttons for each status.
-        for status, first_page in self.status_jump.items():
+        for status in self.source.statuses:
             emoji = STATUS_EMOJI.get(status, "")
-            count = self.status_counts.get(status, 0)
+            count = self.source.status_counts.get(status, 0)
             label = f"{emoji}: {count}"
             btn = discord.ui.Button(label=label, style=BUTTON_STYLE.get(status, discord.ButtonStyle.secondary), row=1)
-            # Capture first_page in the callback.
-            async def jump_callback(interaction: discord.Interaction, page_index=first_page):
+            # Capture status in the callback.
+            async def jump_callback(interaction: discord.Interaction, status=status):
                 if interaction.user != self.author:
                     await interaction.response.send_message("You cannot use these buttons.", ephemeral=True)
                     return
-                self.current = page_index
+                self.history.append(self.source.first_position(status))
                 await self.update_message(interaction)
             btn.callback = jump_callback
             self.add_item(btn)
 
     async def update_message(self, interaction: discord.Interaction):
-        await interaction.response.edit_message(embed=self.pages[self.current], view=self)
+        # Fetching the page hits the database, so acknowledge the click first
+        await interaction.response.defer()
+        embed, self.next_position = await self.source.render(self.history[-1])
+        await interaction.edit_original_response(embed=embed, view=self)
 
     async def previous_callback(self, interaction: discord.Interaction):
         if interaction.user != self.author:
             await interaction.response.send_message("You cannot use these buttons.", ephemeral=True)
             return
-        if self.current > 0:
-            self.current -= 1
+        if len(self.history) > 1:
+            self.history.pop()
             await self.update_message(interaction)
         else:
             await interaction.response.send_message("Already at the first page.", ephemeral=True)
@@ -78,8 +146,8 @@ class TaskPaginator(discord.ui.View):
         if interaction.user != self.author:
             await interaction.response.send_message("You cannot use these buttons.", ephemeral=True)
             return
-        if self.current < len(self.pages) - 1:
-            self.current += 1
+        if self.next_position is not None:
+            self.history.append(self.next_position)
             await self.update_message(interaction)
         else:
             await interaction.response.send_message("Already at the last page.", ephemeral=True)
@@ -87,12 +155,54 @@ class TaskPaginator(discord.ui.View):
 class TaskCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.lookup = None    # TaskPrefixIndex for task_id autocomplete, once loaded
+        self._pending = []    # Tasks created or edited while the index was loading
+        # Rendered /check_tasks pages and status counts, keyed by the version of the data they show
+        self.pages = RenderCache("task_pages", int(RENDER_CACHE_MB * 1024 * 1024))
+        self.versions = DataVersions()
+
+    async def cog_load(self):
+        lookup = TaskPrefixIndex()
+        await run_db(lambda db: lookup.load(crud.iter_task_labels(db)))
+        for task in self._pending:
+            lookup.update(task)
+        self._pending.clear()
+        self.lookup = lookup
+
+    def _track(self, task):
+        self.versions.bump(task.portfolio_id)
+        if self.lookup is None:
+            self._pending.append(task)
+        else:
+            self.lookup.update(task)
+
+    @commands.Cog.listener()
+    async def on_task_created(self, task):
+        self._track(task)
+
+    @commands.Cog.listener()
+    async def on_task_updated(self, task):
+        self._track(task)
+
+    @commands.Cog.listener()
+    async def on_task_changed(self, task, portfolio_ids: set):
+        # Changed through any replica or directly in the database; a task may have moved between portfolios
+        for portfolio_id in portfolio_ids - {task.portfolio_id}:
+            self.versions.bump(portfolio_id)
+        self._track(task)
+
+    @commands.Cog.listener()
+    async def on_task_deleted(self, task_id: int, portfolio_ids: set):
+        for portfolio_id in portfolio_ids:
+            self.versions.bump(portfolio_id)
+        if self.lookup is not None:
+            self.lookup.remove(task_id)
 
     @app_commands.command(name="create_task", description="Create a task for a specific portfolio")
     @app_commands.describe(
         portfolio_id="Select the portfolio where the task will be created",
         title="Title of the task",
-        deadline="Deadline in format DD/MM/YYYY HH:MM or DD/MM/YYYY (time defaults to 00:00)",
+        deadline="DD/MM/YYYY HH:MM, DD/MM/YYYY (00:00), or e.g. \"tomorrow 17:00\", \"next fri\", \"+3d\"",
         priority="Priority of the task",
         description="Task description (optional)"
     )
@@ -108,36 +218,26 @@ class TaskCog(commands.Cog):
             app_commands.Choice(name="High", value="High")
         ]
     )
+    @instrumented
     async def create_task(self, interaction: discord.Interaction, portfolio_id: int, title: str, deadline: str, priority: str = "Low", description: str = ""):
         # Parse the deadline
         deadline_dt = parse_date(deadline)
         if deadline_dt is None:
-            await interaction.response.send_message("Error: Deadline format should be DD/MM/YYYY or DD/MM/YYYY HH:MM", ephemeral=True)
+            await interaction.response.send_message("Error: Deadline should be DD/MM/YYYY, DD/MM/YYYY HH:MM, or a relative date such as \"tomorrow 17:00\", \"next fri\" or \"+3d\"", ephemeral=True)
             return
 
-        db: Session = SessionLocal()
-        portfolio = db.query(Portfolio).filter(Portfolio.portfolio_id == portfolio_id).first()
+        # Acknowledge first, so a slow database cannot blow the interaction deadline
+        with span("defer"):
+            await interaction.response.defer(ephemeral=True, thinking=True)
+
+        portfolio = await self.bot.portfolios.resolve(portfolio_id)
         if not portfolio:
-            await interaction.response.send_message("Error: Specified portfolio not found", ephemeral=True)
-            db.close()
+            await interaction.followup.send("Error: Specified portfolio not found", ephemeral=True)
             return
-
-        # Save necessary portfolio attributes before closing session
         department = portfolio.name
-        portfolio_channel_id = portfolio.channel_id
-
-        new_task = Task(
-            title=title,
-            description=description,
-            deadline=deadline_dt,
-            portfolio_id=portfolio_id,
-            priority=priority,
-            status="Not Started"
-        )
-        db.add(new_task)
-        db.commit()
-        db.refresh(new_task)
-        db.close()
+
+        new_task = await run_db(crud.create_task, title, description, deadline_dt, portfolio_id, priority)
+        self.bot.dispatch("task_created", new_task)
 
         # Build the interaction response embed
         embed = discord.Embed(
@@ -153,16 +253,13 @@ class TaskCog(commands.Cog):
         embed.add_field(name="Created by", value=interaction.user.mention, inline=True)
         embed.set_footer(text=f"Task ID: {new_task.task_id}")
 
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        with span("discord"):
+            await interaction.followup.send(embed=embed, ephemeral=True)
 
         # Send channel notification in the corresponding portfolio channel and mention the role
         try:
-            channel_id = int(portfolio_channel_id)
-            channel = self.bot.get_channel(channel_id)
+            channel = portfolio.channel
             if channel:
-                role_name = f"{department} Portfolio"
-                role = discord.utils.get(channel.guild.roles, name=role_name)
-                role_mention = role.mention if role else ""
                 notification_embed = discord.Embed(
                     title=f"📝 New Task Created: {new_task.title}",
                     description="A new task has been created with the following details:",
@@ -175,13 +272,15 @@ class TaskCog(commands.Cog):
                 notification_embed.add_field(name="Department", value=department, inline=True)
                 notification_embed.add_field(name="Created by", value=interaction.user.mention, inline=True)
                 notification_embed.set_footer(text=f"Task ID: {new_task.task_id}")
-                await channel.send(content=role_mention, embed=notification_embed)
+                summary = (f"ID: {new_task.task_id} | 🎯 {new_task.priority} | "
+                           f"Deadline: {new_task.deadline.strftime('%d/%m/%Y %H:%M')} | Created by {interaction.user.mention}")
+                self.bot.notifier.enqueue(channel, notification_embed, mention=portfolio.role_mention, summary=summary)
         except Exception as e:
             print(f"Error sending channel notification (create_task): {e}")
 
     @app_commands.command(name="edit_task", description="Update the status of a task")
     @app_commands.describe(
-        task_id="ID of the task to edit",
+        task_id="ID of the task to edit; type an ID or words from its title",
         status="New status of the task"
     )
     @app_commands.choices(
@@ -192,21 +291,18 @@ class TaskCog(commands.Cog):
             app_commands.Choice(name="Cancelled", value="Cancelled")
         ]
     )
+    @instrumented
     async def edit_task(self, interaction: discord.Interaction, task_id: int, status: str):
-        db: Session = SessionLocal()
-        task_obj = db.query(Task).filter(Task.task_id == task_id).first()
+        with span("defer"):
+            await interaction.response.defer(ephemeral=True, thinking=True)
+
+        task_obj, old_status = await run_db(crud.update_task_status, task_id, status)
         if not task_obj:
-            await interaction.response.send_message("Error: Specified task not found", ephemeral=True)
-            db.close()
+            await interaction.followup.send("Error: Specified task not found", ephemeral=True)
             return
 
-        old_status = task_obj.status
-        task_obj.status = status
-        db.commit()
-        db.refresh(task_obj)
-        # Save the portfolio_id before closing the session
         portfolio_id = task_obj.portfolio_id
-        db.close()
+        self.bot.dispatch("task_updated", task_obj)
 
         # Build the interaction response embed
         embed = discord.Embed(
@@ -219,24 +315,15 @@ class TaskCog(commands.Cog):
         embed.add_field(name="Task ID", value=task_obj.task_id, inline=True)
         embed.set_footer(text=f"Updated by: {interaction.user.display_name}")
 
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        with span("discord"):
+            await interaction.followup.send(embed=embed, ephemeral=True)
 
         # Send channel notification for task update
         try:
-            db: Session = SessionLocal()
-            portfolio = db.query(Portfolio).filter(Portfolio.portfolio_id == portfolio_id).first()
+            portfolio = await self.bot.portfolios.resolve(portfolio_id)
             if portfolio:
-                # Save needed attributes before closing session
-                department = portfolio.name
-                portfolio_channel_id = portfolio.channel_id
-            db.close()
-            if portfolio:
-                channel_id = int(portfolio_channel_id)
-                channel = self.bot.get_channel(channel_id)
+                channel = portfolio.channel
                 if channel:
-                    role_name = f"{department} Portfolio"
-                    role = discord.utils.get(channel.guild.roles, name=role_name)
-                    role_mention = role.mention if role else ""
                     notification_embed = discord.Embed(
                         title=f"🔄 Task Updated: {task_obj.title}",
                         description="The task status has been updated.",
@@ -246,10 +333,25 @@ class TaskCog(commands.Cog):
                     notification_embed.add_field(name="New Status", value=f"{STATUS_EMOJI.get(task_obj.status, '')} {task_obj.status}", inline=True)
                     notification_embed.add_field(name="Task ID", value=task_obj.task_id, inline=True)
                     notification_embed.set_footer(text=f"Updated by: {interaction.user.display_name}")
-                    await channel.send(content=role_mention, embed=notification_embed)
+                    summary = (f"ID: {task_obj.task_id} | {STATUS_EMOJI.get(old_status, '')} {old_status} → "
+                               f"{STATUS_EMOJI.get(task_obj.status, '')} {task_obj.status} | Updated by {interaction.user.display_name}")
+                    self.bot.notifier.enqueue(channel, notification_embed, mention=portfolio.role_mention, summary=summary)
         except Exception as e:
             print(f"Error sending channel notification (edit_task): {e}")
 
+    @edit_task.autocomplete("task_id")
+    async def task_id_autocomplete(self, interaction: discord.Interaction, current: str):
+        """Suggests tasks by id prefix or title words, from memory so it answers well within Discord's deadline."""
+        if self.lookup is None:
+            return []
+        choices = []
+        # Discord sends the typed value as-is, which may be a number for an integer option
+        for task_id in self.lookup.suggest(str(current)):
+            title, status = self.lookup.label(task_id)
+            name = f"#{task_id} · {STATUS_EMOJI.get(status, '')} {title}"
+            choices.append(app_commands.Choice(name=name if len(name) <= 100 else name[:99] + "…", value=task_id))
+        return choices
+
     @app_commands.command(name="check_tasks", description="Display a list of tasks")
     @app_commands.describe(
         portfolio_id="Optional: Select a portfolio to filter tasks. If not provided, tasks from all departments will be displayed"
@@ -261,74 +363,178 @@ class TaskCog(commands.Cog):
             app_commands.Choice(name="EVENTS", value=28)
         ]
     )
+    @instrumented
     async def check_tasks(self, interaction: discord.Interaction, portfolio_id: int = None):
-        db: Session = SessionLocal()
-        if portfolio_id:
-            tasks_list = db.query(Task).filter(Task.portfolio_id == portfolio_id).all()
-            department = db.query(Portfolio).filter(Portfolio.portfolio_id == portfolio_id).first().name
-        else:
-            tasks_list = db.query(Task).all()
-            portfolios = db.query(Portfolio).all()
-            portfolio_map = {p.portfolio_id: p.name for p in portfolios}
-        db.close()
+        with span("defer"):
+            await interaction.response.defer(ephemeral=True, thinking=True)
 
-        if not tasks_list:
-            await interaction.response.send_message("No tasks found.", ephemeral=True)
+        # Repeat views of unchanged data are served from the render cache without touching the database
+        version = (self.versions.get(portfolio_id), self.bot.portfolios.generation)
+        counts_key = ("counts", portfolio_id, version)
+        status_counts = self.pages.get(counts_key)
+        if status_counts is None:
+            status_counts = await run_db(crud.count_tasks_by_status, portfolio_id)
+            self.pages.put(counts_key, status_counts)
+        if not any(status_counts.get(status) for status in STATUSES_ORDER):
+            await interaction.followup.send("No tasks found.", ephemeral=True)
             return
 
-        # Group tasks by status and count them.
-        grouped_tasks = {}
-        status_counts = {}
-        for task in tasks_list:
-            status = task.status
-            grouped_tasks.setdefault(status, []).append(task)
-            status_counts[status] = status_counts.get(status, 0) + 1
-
-        # Fixed status order.
-        statuses_order = ["Not Started", "In Progress", "Completed", "Cancelled"]
-
-        pages = []
-        status_jump = {}  # Mapping from status to first page index.
-        current_page_index = 0
-
-        for status in statuses_order:
-            if status not in grouped_tasks:
-                continue
-            entries = []
-            for task in grouped_tasks[status]:
-                deadline_str = task.deadline.strftime("%d/%m/%Y %H:%M") if task.deadline else "None"
-                entry = (f"**ID:** {task.task_id} | **Title:** {task.title}\n"
-                         f"**Description:** {task.description or 'None'}\n"
-                         f"**Priority:** {task.priority}\n"
-                         f"**Deadline:** {deadline_str}")
-                if not portfolio_id:
-                    dept = portfolio_map.get(task.portfolio_id, "Unknown")
-                    entry += f"\n**Department:** {dept}"
-                entries.append(entry)
-            group_text = "\n\n".join(entries)
-            chunks = split_text(group_text, 1024)
-            for idx, chunk in enumerate(chunks):
-                embed = discord.Embed(title="📋 Task List", color=0x9b59b6)
-                if portfolio_id:
-                    embed.description = f"Tasks for **{department}** department."
-                else:
-                    embed.description = "Tasks for **all departments**."
-                embed.add_field(name=f"{STATUS_EMOJI.get(status, '')} {status} (Page {idx+1}/{len(chunks)})", value=chunk, inline=False)
-                # embed.set_footer(text=f"Requested by {interaction.user.display_name}")
-                pages.append(embed)
-                if idx == 0:
-                    status_jump[status] = current_page_index
-                current_page_index += 1
-
-        if not pages:
-            await interaction.response.send_message("No tasks found.", ephemeral=True)
+        # Only the first page is fetched and rendered now; the paginator loads the others on demand
+        source = TaskPageSource(self.bot, portfolio_id, status_counts, self.pages, version)
+        embed, next_position = await source.render(source.first_position())
+
+        with span("discord"):
+            if next_position is None:
+                await interaction.followup.send(embed=embed, ephemeral=True)
+            else:
+                paginator = TaskPaginator(source, interaction.user, next_position)
+                await interaction.followup.send(embed=embed, view=paginator, ephemeral=True)
+
+    async def notify_portfolios(self, lines_by_portfolio: dict, title: str, color: int, user: discord.abc.User):
+        """Sends one summary notification per portfolio channel, listing as many of its lines as fit."""
+        for portfolio_id, lines in lines_by_portfolio.items():
+            try:
+                portfolio = await self.bot.portfolios.resolve(portfolio_id)
+                if not portfolio or not portfolio.channel:
+                    continue
+                text, used = fit_entries(lines)
+                if used < len(lines):
+                    text, used = fit_entries(lines, FIELD_LIMIT - 30)
+                    text += f"\n…and {len(lines) - used} more"
+                notification_embed = discord.Embed(
+                    title=title,
+                    description=f"{len(lines)} task(s) in **{portfolio.name}**:",
+                    color=color
+                )
+                notification_embed.add_field(name="Tasks", value=text, inline=False)
+                notification_embed.set_footer(text=f"By: {user.display_name}")
+                summary = f"{len(lines)} task(s) | By {user.display_name}"
+                self.bot.notifier.enqueue(portfolio.channel, notification_embed, mention=portfolio.role_mention, summary=summary)
+            except Exception as e:
+                print(f"Error sending channel notification ({title}): {e}")
+
+    @app_commands.command(name="import_tasks", description="Create tasks from a CSV or JSON file")
+    @app_commands.describe(
+        file="CSV (header row) or JSON file with title, deadline, portfolio, priority, status and description",
+        portfolio_id="Portfolio used for rows that do not name one"
+    )
+    @app_commands.choices(
+        portfolio_id=[
+            app_commands.Choice(name="IT", value=26),
+            app_commands.Choice(name="MARKETING", value=27),
+            app_commands.Choice(name="EVENTS", value=28)
+        ]
+    )
+    @instrumented
+    async def import_tasks(self, interaction: discord.Interaction, file: discord.Attachment, portfolio_id: int = None):
+        if file.size > MAX_IMPORT_BYTES:
+            await interaction.response.send_message(f"Error: The file is larger than {MAX_IMPORT_BYTES // 1024} KB.", ephemeral=True)
             return
+        with span("defer"):
+            await interaction.response.defer(ephemeral=True, thinking=True)
 
-        if len(pages) == 1:
-            await interaction.response.send_message(embed=pages[0], ephemeral=True)
-        else:
-            paginator = TaskPaginator(pages, interaction.user, status_jump, status_counts)
-            await interaction.response.send_message(embed=pages[0], view=paginator, ephemeral=True)
+        with span("validate"):
+            data = await file.read()
+            rows, errors = validate_file(data, file.filename, self.bot.portfolios, portfolio_id)
+        if errors:
+            # Nothing is written unless the whole file is valid
+            await interaction.followup.send("Error: No tasks were imported.\n" + "\n".join(errors), ephemeral=True)
+            return
+        if not rows:
+            await interaction.followup.send("Error: The file contains no tasks.", ephemeral=True)
+            return
+
+        new_tasks = await run_db(crud.create_tasks, rows)
+        for task in new_tasks:
+            self.bot.dispatch("task_created", task)
+
+        lines_by_portfolio = {}
+        for task in new_tasks:
+            lines_by_portfolio.setdefault(task.portfolio_id, []).append(
+                f"**ID:** {task.task_id} | {task.title} | 🎯 {task.priority} | {task.deadline.strftime('%d/%m/%Y %H:%M')}"
+            )
+
+        embed = discord.Embed(
+            title=f"📥 Imported {len(new_tasks)} Task(s)",
+            description="The tasks have been created.",
+            color=0x00ff00
+        )
+        for pid, lines in lines_by_portfolio.items():
+            embed.add_field(name=self.bot.portfolios.name(pid), value=f"{len(lines)} task(s)", inline=True)
+        embed.set_footer(text=f"Task IDs: {new_tasks[0].task_id}–{new_tasks[-1].task_id}")
+        with span("discord"):
+            await interaction.followup.send(embed=embed, ephemeral=True)
+
+        await self.notify_portfolios(lines_by_portfolio, "📥 Tasks Imported", 0x00ff00, interaction.user)
+
+    @app_commands.command(name="bulk_edit_tasks", description="Update the status of many tasks at once")
+    @app_commands.describe(
+        status="New status of the tasks",
+        from_id="Optional: First task ID of the range",
+        to_id="Optional: Last task ID of the range",
+        portfolio_id="Optional: Only tasks of this portfolio",
+        current_status="Optional: Only tasks that currently have this status"
+    )
+    @app_commands.choices(
+        status=[
+            app_commands.Choice(name="Not Started", value="Not Started"),
+            app_commands.Choice(name="In Progress", value="In Progress"),
+            app_commands.Choice(name="Completed", value="Completed"),
+            app_commands.Choice(name="Cancelled", value="Cancelled")
+        ],
+        portfolio_id=[
+            app_commands.Choice(name="IT", value=26),
+            app_commands.Choice(name="MARKETING", value=27),
+            app_commands.Choice(name="EVENTS", value=28)
+        ],
+        current_status=[
+            app_commands.Choice(name="Not Started", value="Not Started"),
+            app_commands.Choice(name="In Progress", value="In Progress"),
+            app_commands.Choice(name="Completed", value="Completed"),
+            app_commands.Choice(name="Cancelled", value="Cancelled")
+        ]
+    )
+    @instrumented
+    async def bulk_edit_tasks(self, interaction: discord.Interaction, status: str, from_id: int = None, to_id: int = None,
+                              portfolio_id: int = None, current_status: str = None):
+        if from_id is None and to_id is None and portfolio_id is None and current_status is None:
+            await interaction.response.send_message("Error: Give an ID range, a portfolio or a current status to select tasks.", ephemeral=True)
+            return
+        if from_id is not None and to_id is not None and from_id > to_id:
+            await interaction.response.send_message("Error: from_id must not be greater than to_id.", ephemeral=True)
+            return
+        with span("defer"):
+            await interaction.response.defer(ephemeral=True, thinking=True)
+
+        changed = await run_db(crud.bulk_update_status, status, from_id, to_id, portfolio_id, current_status, MAX_BULK_EDIT)
+        if changed is None:
+            await interaction.followup.send(f"Error: More than {MAX_BULK_EDIT} tasks match; narrow the selection.", ephemeral=True)
+            return
+        if not changed:
+            await interaction.followup.send(f"No matching tasks needed to change to {status}.", ephemeral=True)
+            return
+        for task, _ in changed:
+            self.bot.dispatch("task_updated", task)
+
+        new_label = f"{STATUS_EMOJI.get(status, '')} {status}"
+        lines_by_portfolio = {}
+        for task, old_status in changed:
+            lines_by_portfolio.setdefault(task.portfolio_id, []).append(
+                f"**ID:** {task.task_id} | {task.title} | {STATUS_EMOJI.get(old_status, '')} {old_status} → {new_label}"
+            )
+
+        embed = discord.Embed(
+            title=f"🔄 Updated {len(changed)} Task(s)",
+            description=f"The tasks are now {new_label}.",
+            color=0x3498db
+        )
+        for old_status, count in Counter(old for _, old in changed).items():
+            embed.add_field(name=f"From {STATUS_EMOJI.get(old_status, '')} {old_status}", value=f"{count} task(s)", inline=True)
+        embed.set_footer(text=f"Updated by: {interaction.user.display_name}")
+        with span("discord"):
+            await interaction.followup.send(embed=embed, ephemeral=True)
+
+        await self.notify_portfolios(lines_by_portfolio, "🔄 Tasks Updated", 0x3498db, interaction.user)
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(TaskCog(bot))
\ No newline at end of file
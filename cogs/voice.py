@@ -1,80 +1,139 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import os
+import shutil
 import time
-import tempfile
-import asyncio
-from supabase import create_client
-import subprocess
+from config import RECORDINGS_BUCKET, RECORDING_POSTPROCESS, MEETINGS_ROW_KEY
+from utils.recording import encoder_for, build_playlist, SegmentedRecorder, pcm_sink, load_voice_recv
+from utils.upload_worker import UploadWorker
+from utils.postprocess import PostProcessor
+from utils.metrics import gauge
+from utils.instrumentation import instrumented
 
 connections = {}
-ffmpeg_processes = {} 
+recordings = {}  # guild_id -> (recorder, meeting folder in the bucket, meeting name, portfolio id, post-processing job dir)
+starting = set()  # guild ids whose recording is being set up and is not in recordings yet
 
 class Voice(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.meeting_name = ""
-        self.portfolio_id = ""
 
-    async def finished_callback(self, interaction: discord.Interaction, file_path: str):
-        await self.upload_to_supabase(interaction, file_path)
-
-        os.remove(file_path)
-
-        await interaction.channel.send("Finished recording and uploaded the file.")
-
-    async def upload_to_supabase(self, interaction, file_path):
-        try:
-            SUPABASE_URL = os.getenv("SUPABASE_URL")
-            SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-            supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-            curr_time = time.time()
-            file_name = f"{self.meeting_name}_{curr_time}.wav"
-
-            with open(file_path, "rb") as audio_file:
-                raw_audio_data = audio_file.read()
-
-            supabase.table("Meetings Records").insert({
-                "Meeting ID": f"meeting_{curr_time}",
-                "Meeting Date": time.strftime("%Y-%m-%d"),
-                "Meeting Name": self.meeting_name,
-                "Raw Audio Data": raw_audio_data,
-                "Auto Caption": "",
-                "Summary": "",
-                "Portfolio ID": self.portfolio_id
-            }).execute()
-
-            await interaction.followup.send(f"Recording uploaded directly to the 'Meetings' table as `{file_name}`.")
-        except Exception as e:
-            await interaction.followup.send(f"Failed to upload recording: {e}")
+    async def cog_load(self):
+        # Uploads run in the background and survive restarts through the spool directory
+        self.uploads = UploadWorker(self.bot)
+        await self.uploads.start()
+        gauge("taskbot_upload_jobs_pending", "Recording uploads queued or waiting for a retry", fn=self.uploads.pending)
+        # Finished recordings are post-processed in worker processes, then uploaded
+        self.processing = PostProcessor(self.bot, self.uploads) if RECORDING_POSTPROCESS else None
+        if self.processing is not None:
+            await self.processing.start()
+            gauge("taskbot_postprocess_jobs_pending", "Recordings waiting for post-processing or a retry", fn=self.processing.pending)
+        gauge("taskbot_recording_queue_frames", "Voice frames buffered before the encoders",
+              fn=lambda: sum(recorder.queue_depth for recorder, *_ in recordings.values()))
+        gauge("taskbot_recording_dropped_frames", "Voice frames dropped by active recordings",
+              fn=lambda: sum(recorder.frames_dropped for recorder, *_ in recordings.values()))
+
+    async def cog_unload(self):
+        if self.processing is not None:
+            await self.processing.stop()
+        await self.uploads.stop()
+
+    def upload_segment(self, folder: str, segment, job_dir: str = None):
+        """Queues one closed segment for upload while the meeting is still being recorded."""
+        extension, content_type, _ = encoder_for()
+        name = f"part_{segment.index:03d}{extension}"
+        if job_dir is not None:
+            self.processing.keep(job_dir, segment.path, name)
+        self.uploads.submit(segment.path, RECORDINGS_BUCKET, f"{folder}/{name}", content_type)
+
+    async def finished_callback(self, interaction: discord.Interaction, folder: str, segments: list, meeting_name: str,
+                                portfolio_id: str, job_dir: str = None):
+        if job_dir is not None and not segments:
+            # Nothing was recorded, so there is nothing to process
+            shutil.rmtree(job_dir, ignore_errors=True)
+            job_dir = None
+        self.upload_to_supabase(interaction, folder, segments, meeting_name, portfolio_id, job_dir)
+        if job_dir is not None:
+            message = "The remaining audio is being uploaded and post-processed in the background."
+        else:
+            message = "The remaining audio is being uploaded in the background."
+        await interaction.followup.send(f"Finished recording ({len(segments)} part(s)). {message}")
+
+    def upload_to_supabase(self, interaction, folder: str, segments: list, meeting_name: str, portfolio_id: str,
+                           job_dir: str = None):
+        """
+        Uploads the playlist that joins the meeting's segments, together with its Meetings Records row.
+        The segments themselves were queued as they were closed.
+        With post-processing, the row is inserted by the post-processing job instead, once its results are stored.
+        """
+        extension, _, _ = encoder_for()
+        part_names = [f"part_{segment.index:03d}{extension}" for segment in segments]
+        playlist = build_playlist(part_names, segments)
+        playlist_path = self.uploads.spool_path(".m3u")
+        with open(playlist_path, "w", encoding="utf-8") as f:
+            f.write(playlist)
+
+        row = {
+            "Meeting ID": f"meeting_{folder.rsplit('_', 1)[-1]}",
+            "Meeting Date": time.strftime("%Y-%m-%d"),
+            "Meeting Name": meeting_name,
+            "Raw Audio Data": None,
+            "Audio Path": f"{RECORDINGS_BUCKET}/{folder}/playlist.m3u",
+            "Auto Caption": "",
+            "Summary": "",
+            "Portfolio ID": portfolio_id
+        }
+        if job_dir is not None:
+            self.uploads.submit(playlist_path, RECORDINGS_BUCKET, f"{folder}/playlist.m3u", "audio/x-mpegurl")
+            self.processing.submit(job_dir, part_names, folder, meeting_name, row, playlist, interaction.channel_id)
+            return
+
+        self.uploads.submit(
+            playlist_path,
+            RECORDINGS_BUCKET,
+            f"{folder}/playlist.m3u",
+            "audio/x-mpegurl",
+            table="Meetings Records",
+            row=row,
+            channel_id=interaction.channel_id,
+            row_key=MEETINGS_ROW_KEY
+        )
 
     @app_commands.command(name="record_voice", description="Start recording audio in the voice channel.")
+    @instrumented
     async def record(self, interaction: discord.Interaction, meeting_name: str, portfolio_id: str):
         """Start recording voice in a VC using ffmpeg."""
         voice = interaction.user.voice
-        self.meeting_name = meeting_name
-        self.portfolio_id = portfolio_id
+        voice_recv = load_voice_recv()
 
         if not voice:
             return await interaction.response.send_message("You're not in a VC!", ephemeral=True)
+        if interaction.guild.id in recordings or interaction.guild.id in starting:
+            return await interaction.response.send_message("Already recording in this server.", ephemeral=True)
 
-        vc = interaction.guild.voice_client
-        connections[interaction.guild.id] = vc
-        
-        temp_wav_file = tempfile.NamedTemporaryFile(delete=False, suffix=".wav").name
-        ffmpeg_process = await asyncio.create_subprocess_exec(
-            "ffmpeg",
-            "-f", "s16le",  
-            "-ar", "48000",  
-            "-ac", "2",      
-            "-i", "-",       
-            temp_wav_file,   
-            stdin=subprocess.PIPE,
-            stderr=subprocess.DEVNULL
-        )
-        ffmpeg_processes[interaction.guild.id] = (ffmpeg_process, temp_wav_file)
+        # Reserve the guild before the first await, so a second /record_voice cannot start another recording meanwhile
+        starting.add(interaction.guild.id)
+        try:
+            # Receiving audio needs a voice_recv client; reconnect if joined with a plain one
+            vc = interaction.guild.voice_client
+            if vc and not isinstance(vc, voice_recv.VoiceRecvClient):
+                await vc.disconnect()
+                vc = None
+            if vc is None:
+                vc = await voice.channel.connect(cls=voice_recv.VoiceRecvClient)
+            connections[interaction.guild.id] = vc
+
+            # Decoded voice frames flow sink -> per-user mixer -> bounded queue -> encoder stdin, into rolling compressed segments
+            # that are uploaded as soon as they are closed
+            folder = f"{meeting_name}_{time.time()}"
+            # Closed segments are also kept for post-processing once the meeting ends
+            job_dir = self.processing.new_job() if self.processing is not None else None
+            recorder = SegmentedRecorder(self.uploads.spool_path, lambda segment: self.upload_segment(folder, segment, job_dir))
+            await recorder.start()
+            vc.listen(pcm_sink(recorder))
+            recordings[interaction.guild.id] = (recorder, folder, meeting_name, portfolio_id, job_dir)
+        finally:
+            starting.discard(interaction.guild.id)
 
         # Respond to the interaction
         if not interaction.response.is_done():
@@ -83,36 +142,46 @@ class Voice(commands.Cog):
             await interaction.followup.send("Recording started. Use `/stop_voice_record` to stop.")
 
     @app_commands.command(name="stop_voice_record", description="Stop recording and save the file.")
+    @instrumented
     async def stop_record(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
 
-        if interaction.guild.id in ffmpeg_processes:
-            ffmpeg_process, temp_wav_file = ffmpeg_processes[interaction.guild.id]
-            ffmpeg_process.stdin.close()
-            await ffmpeg_process.wait()
+        if interaction.guild.id in recordings:
+            recorder, folder, meeting_name, portfolio_id, job_dir = recordings[interaction.guild.id]
 
             if interaction.guild.id in connections:
                 vc = connections[interaction.guild.id]
+                vc.stop_listening()
                 await vc.disconnect()
                 del connections[interaction.guild.id] 
 
-            del ffmpeg_processes[interaction.guild.id]
+            del recordings[interaction.guild.id]
+
+            # Flush the queued frames and let ffmpeg finish the last segment
+            segments = await recorder.close()
+            if recorder.frames_dropped:
+                print(f"Recording in guild {interaction.guild.id} dropped {recorder.frames_dropped} frames")
 
-            await self.finished_callback(interaction, temp_wav_file)
+            await self.finished_callback(interaction, folder, segments, meeting_name, portfolio_id, job_dir)
+        elif interaction.guild.id in starting:
+            await interaction.followup.send("The recording is still starting, try again in a moment.", ephemeral=True)
         else:
             await interaction.followup.send("Not recording in this server.", ephemeral=True)
 
     @app_commands.command(name="join_voice", description="Join a voice channel.")
+    @instrumented
     async def join_voice(self, interaction: discord.Interaction):
         """Joins the voice channel the user is in."""
         if interaction.user.voice:
             channel = interaction.user.voice.channel
-            await channel.connect()
+            # Connect with a receiving client so /record_voice can reuse the connection
+            await channel.connect(cls=load_voice_recv().VoiceRecvClient)
             await interaction.response.send_message(f"Joined {channel.name}!")
         else:
             await interaction.response.send_message("Join a voice channel first.", ephemeral=True)
 
     @app_commands.command(name="leave_voice", description="Leave the voice channel.")
+    @instrumented
     async def leave_voice(self, interaction: discord.Interaction):
         """Leaves the voice channel if connected."""
         voice_client = interaction.guild.voice_client
@@ -6,3 +6,55 @@ from dotenv import load_dotenv
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
+
+# Number of threads (and so concurrent connections) used for database work
+DB_WORKERS = int(os.getenv("DB_WORKERS", "5"))
+
+# Supabase project used for meeting recordings
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+# Storage bucket that receives the encoded recordings
+RECORDINGS_BUCKET = os.getenv("RECORDINGS_BUCKET", "recordings")
+# Codec used while recording: "opus" (small, lossy) or "flac" (lossless)
+RECORDING_FORMAT = os.getenv("RECORDING_FORMAT", "opus")
+# Local directory where finished recordings wait until they are uploaded
+RECORDINGS_SPOOL_DIR = os.getenv("RECORDINGS_SPOOL_DIR", "recordings_spool")
+# Long recordings are split into files of at most this many minutes or megabytes
+RECORDING_SEGMENT_MINUTES = float(os.getenv("RECORDING_SEGMENT_MINUTES", "10"))
+RECORDING_SEGMENT_MB = float(os.getenv("RECORDING_SEGMENT_MB", "50"))
+# Column of "Meetings Records" with a unique constraint (e.g. "Meeting ID"); if set, a retried row insert cannot add a duplicate
+MEETINGS_ROW_KEY = os.getenv("MEETINGS_ROW_KEY")
+
+# Command traces slower than this are always printed; TRACE_SAMPLE_RATE of the rest are printed too
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "1000"))
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+# The event loop counts as stalled when it has not run for this long
+STALL_THRESHOLD_MS = float(os.getenv("STALL_THRESHOLD_MS", "500"))
+
+# When to push slash commands to Discord on startup: "auto" (only when they changed), "always" or "never"
+COMMAND_SYNC = os.getenv("COMMAND_SYNC", "auto")
+
+# IANA timezone (e.g. "Europe/London") that deadlines are entered, stored and reminded in; defaults to the server's local time
+TIMEZONE = os.getenv("TIMEZONE")
+
+# Identifies this replica in leader leases; defaults to hostname and process id
+REPLICA_ID = os.getenv("REPLICA_ID")
+# Only the replica holding the scheduler lease sends reminders. It renews the lease every LEASE_RENEW_SECONDS;
+# if it stops, another replica takes over once LEASE_TTL_SECONDS have passed.
+LEASE_TTL_SECONDS = float(os.getenv("LEASE_TTL_SECONDS", "30"))
+LEASE_RENEW_SECONDS = float(os.getenv("LEASE_RENEW_SECONDS", "10"))
+
+# Bearer token required by the /export/tasks endpoint; the endpoint is disabled while this is unset
+EXPORT_TOKEN = os.getenv("EXPORT_TOKEN")
+
+# Memory budget for rendered /check_tasks pages, in megabytes
+RENDER_CACHE_MB = float(os.getenv("RENDER_CACHE_MB", "8"))
+
+# How often each replica reads the change log; on PostgreSQL, NOTIFY wakes it up sooner
+CHANGE_POLL_SECONDS = float(os.getenv("CHANGE_POLL_SECONDS", "2"))
+
+# Finished recordings are joined, trimmed, loudness-normalized and transcoded in a pool of worker processes
+RECORDING_POSTPROCESS = os.getenv("RECORDING_POSTPROCESS", "1") not in ("0", "false", "no")
+PROCESSING_WORKERS = int(os.getenv("PROCESSING_WORKERS", "2"))
+# Optional offline transcription, as "module:function"; the function takes an audio file path and returns the text
+TRANSCRIBER = os.getenv("TRANSCRIBER")
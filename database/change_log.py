@@ -0,0 +1,150 @@
+# database/change_log.py
+# Triggers that record every change to tasks and portfolios in change_log and keep task_status_counts
+# current, and the queries that read the log.
+# Writes by the bot, by other replicas and by hand in the database are all captured the same way.
+from datetime import datetime
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.orm import Session
+from database.models import ChangeLogEntry
+
+# PostgreSQL channel notified after every logged change, so replicas can poll right away
+NOTIFY_CHANNEL = "taskbot_changes"
+
+POSTGRES_TRIGGERS = (
+    f"""
+    CREATE OR REPLACE FUNCTION taskbot_log_task_change() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            INSERT INTO change_log (entity, entity_id, portfolio_id, op, changed_at)
+            VALUES ('task', OLD.task_id, OLD.portfolio_id, 'delete', now() AT TIME ZONE 'utc');
+        ELSE
+            INSERT INTO change_log (entity, entity_id, portfolio_id, op, changed_at)
+            VALUES ('task', NEW.task_id, NEW.portfolio_id, lower(TG_OP), now() AT TIME ZONE 'utc');
+            IF TG_OP = 'UPDATE' AND OLD.portfolio_id IS DISTINCT FROM NEW.portfolio_id THEN
+                INSERT INTO change_log (entity, entity_id, portfolio_id, op, changed_at)
+                VALUES ('task', NEW.task_id, OLD.portfolio_id, 'update', now() AT TIME ZONE 'utc');
+            END IF;
+        END IF;
+        -- Identical notifications are merged per transaction, so bulk writes send just one
+        PERFORM pg_notify('{NOTIFY_CHANNEL}', '');
+        RETURN NULL;
+    END $$
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION taskbot_log_portfolio_change() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO change_log (entity, entity_id, op, changed_at)
+        VALUES ('portfolio', CASE WHEN TG_OP = 'DELETE' THEN OLD.portfolio_id ELSE NEW.portfolio_id END,
+                lower(TG_OP), now() AT TIME ZONE 'utc');
+        PERFORM pg_notify('{NOTIFY_CHANNEL}', '');
+        RETURN NULL;
+    END $$
+    """,
+    "DROP TRIGGER IF EXISTS tasks_change_log ON tasks",
+    "CREATE TRIGGER tasks_change_log AFTER INSERT OR UPDATE OR DELETE ON tasks "
+    "FOR EACH ROW EXECUTE FUNCTION taskbot_log_task_change()",
+    "DROP TRIGGER IF EXISTS portfolios_change_log ON portfolios",
+    "CREATE TRIGGER portfolios_change_log AFTER INSERT OR UPDATE OR DELETE ON portfolios "
+    "FOR EACH ROW EXECUTE FUNCTION taskbot_log_portfolio_change()",
+)
+
+# Status counters are adjusted once per statement from its transition tables, so a bulk write costs
+# one upsert per (portfolio, status) it touches rather than one per task
+_COUNT_UPSERT = (
+    "INSERT INTO task_status_counts (portfolio_id, status, count) "
+    "SELECT portfolio_id, status, sum(delta) FROM ({rows}) AS changed "
+    "WHERE status IS NOT NULL GROUP BY portfolio_id, status HAVING sum(delta) <> 0 "
+    "ON CONFLICT (portfolio_id, status) DO UPDATE SET count = task_status_counts.count + EXCLUDED.count;"
+)
+_OLD_ROWS = "SELECT coalesce(portfolio_id, 0) AS portfolio_id, status, -1 AS delta FROM old_rows"
+_NEW_ROWS = "SELECT coalesce(portfolio_id, 0) AS portfolio_id, status, 1 AS delta FROM new_rows"
+
+POSTGRES_COUNT_TRIGGERS = (
+    f"""
+    CREATE OR REPLACE FUNCTION taskbot_count_task_status() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            {_COUNT_UPSERT.format(rows=_NEW_ROWS)}
+        ELSIF TG_OP = 'DELETE' THEN
+            {_COUNT_UPSERT.format(rows=_OLD_ROWS)}
+        ELSE
+            {_COUNT_UPSERT.format(rows=f"{_OLD_ROWS} UNION ALL {_NEW_ROWS}")}
+        END IF;
+        RETURN NULL;
+    END $$
+    """,
+    "DROP TRIGGER IF EXISTS tasks_status_counts_insert ON tasks",
+    "CREATE TRIGGER tasks_status_counts_insert AFTER INSERT ON tasks REFERENCING NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION taskbot_count_task_status()",
+    "DROP TRIGGER IF EXISTS tasks_status_counts_update ON tasks",
+    "CREATE TRIGGER tasks_status_counts_update AFTER UPDATE ON tasks "
+    "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION taskbot_count_task_status()",
+    "DROP TRIGGER IF EXISTS tasks_status_counts_delete ON tasks",
+    "CREATE TRIGGER tasks_status_counts_delete AFTER DELETE ON tasks REFERENCING OLD TABLE AS old_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION taskbot_count_task_status()",
+)
+
+def _sqlite_trigger(table: str, op: str, values: str) -> str:
+    return (
+        f"CREATE TRIGGER IF NOT EXISTS {table}_change_log_{op.lower()} AFTER {op} ON {table} BEGIN "
+        f"INSERT INTO change_log (entity, entity_id, portfolio_id, op, changed_at) VALUES ({values}, CURRENT_TIMESTAMP); END"
+    )
+
+SQLITE_TRIGGERS = (
+    _sqlite_trigger("tasks", "INSERT", "'task', NEW.task_id, NEW.portfolio_id, 'insert'"),
+    _sqlite_trigger("tasks", "UPDATE", "'task', NEW.task_id, NEW.portfolio_id, 'update'"),
+    # A task moved to another portfolio changes both
+    "CREATE TRIGGER IF NOT EXISTS tasks_change_log_move AFTER UPDATE OF portfolio_id ON tasks "
+    "WHEN OLD.portfolio_id IS NOT NEW.portfolio_id BEGIN "
+    "INSERT INTO change_log (entity, entity_id, portfolio_id, op, changed_at) "
+    "VALUES ('task', NEW.task_id, OLD.portfolio_id, 'update', CURRENT_TIMESTAMP); END",
+    _sqlite_trigger("tasks", "DELETE", "'task', OLD.task_id, OLD.portfolio_id, 'delete'"),
+    _sqlite_trigger("portfolios", "INSERT", "'portfolio', NEW.portfolio_id, NULL, 'insert'"),
+    _sqlite_trigger("portfolios", "UPDATE", "'portfolio', NEW.portfolio_id, NULL, 'update'"),
+    _sqlite_trigger("portfolios", "DELETE", "'portfolio', OLD.portfolio_id, NULL, 'delete'"),
+)
+
+def _sqlite_count(row: str, delta: int) -> str:
+    """Adds delta to the counter of the NEW or OLD row's (portfolio, status); tasks without a status are not counted."""
+    return (
+        f"INSERT INTO task_status_counts (portfolio_id, status, count) "
+        f"SELECT coalesce({row}.portfolio_id, 0), {row}.status, {delta} WHERE {row}.status IS NOT NULL "
+        f"ON CONFLICT (portfolio_id, status) DO UPDATE SET count = count + {delta};"
+    )
+
+# SQLite has no statement-level triggers, so the counters are adjusted per row
+SQLITE_COUNT_TRIGGERS = (
+    f"CREATE TRIGGER IF NOT EXISTS tasks_status_counts_insert AFTER INSERT ON tasks BEGIN {_sqlite_count('NEW', 1)} END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_status_counts_update AFTER UPDATE OF status, portfolio_id ON tasks "
+    "WHEN OLD.status IS NOT NEW.status OR OLD.portfolio_id IS NOT NEW.portfolio_id "
+    f"BEGIN {_sqlite_count('OLD', -1)} {_sqlite_count('NEW', 1)} END",
+    f"CREATE TRIGGER IF NOT EXISTS tasks_status_counts_delete AFTER DELETE ON tasks BEGIN {_sqlite_count('OLD', -1)} END",
+)
+
+def create_change_triggers(connection):
+    """Installs (or replaces) the change_log and status counter triggers for PostgreSQL or SQLite."""
+    if connection.dialect.name == "postgresql":
+        statements = POSTGRES_TRIGGERS + POSTGRES_COUNT_TRIGGERS
+    else:
+        statements = SQLITE_TRIGGERS + SQLITE_COUNT_TRIGGERS
+    for statement in statements:
+        connection.execute(text(statement))
+
+def latest_change_id(db: Session) -> int:
+    return db.execute(select(func.max(ChangeLogEntry.change_id))).scalar() or 0
+
+def fetch_changes(db: Session, after: int, limit: int = 1000) -> list:
+    """Returns up to `limit` (change_id, entity, entity_id, portfolio_id, op) rows logged after change `after`, oldest first."""
+    return db.execute(
+        select(ChangeLogEntry.change_id, ChangeLogEntry.entity, ChangeLogEntry.entity_id,
+               ChangeLogEntry.portfolio_id, ChangeLogEntry.op)
+        .where(ChangeLogEntry.change_id > after)
+        .order_by(ChangeLogEntry.change_id)
+        .limit(limit)
+    ).all()
+
+def prune_changes(db: Session, before: datetime):
+    """Deletes change records logged before the given UTC time."""
+    db.execute(delete(ChangeLogEntry).where(ChangeLogEntry.changed_at < before))
+    db.commit()
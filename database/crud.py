@@ -0,0 +1,190 @@
+# database/crud.py
+# Blocking queries used by the cogs. Each function takes an open session as its first
+# argument and is meant to be awaited through database.db.run_db.
+from datetime import datetime
+from sqlalchemy import func, tuple_, insert, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from database.db import dialect_insert
+from database.models import Task, Portfolio, TaskStatusCount, BotState
+from database.read_models import LIST_COLUMNS, REMINDER_COLUMNS, list_rows, reminder_rows
+
+def get_portfolio(db: Session, portfolio_id: int):
+    return db.query(Portfolio).filter(Portfolio.portfolio_id == portfolio_id).first()
+
+def get_portfolios(db: Session, portfolio_ids=None) -> list:
+    query = db.query(Portfolio)
+    if portfolio_ids is not None:
+        query = query.filter(Portfolio.portfolio_id.in_(portfolio_ids))
+    return query.all()
+
+def create_task(db: Session, title: str, description: str, deadline: datetime, portfolio_id: int, priority: str) -> Task:
+    new_task = Task(
+        title=title,
+        description=description,
+        deadline=deadline,
+        portfolio_id=portfolio_id,
+        priority=priority,
+        status="Not Started"
+    )
+    db.add(new_task)
+    db.commit()
+    db.refresh(new_task)
+    return new_task
+
+def update_task_status(db: Session, task_id: int, status: str):
+    """
+    Sets the status of a task.
+    Returns (task, old_status), or (None, None) if the task does not exist.
+    """
+    # Lock the row so concurrent edits cannot both report the same old status
+    task_obj = db.query(Task).filter(Task.task_id == task_id).with_for_update().first()
+    if not task_obj:
+        return None, None
+    old_status = task_obj.status
+    task_obj.status = status
+    db.commit()
+    db.refresh(task_obj)
+    return task_obj, old_status
+
+# Rows written per multi-row INSERT by create_tasks
+INSERT_BATCH = 500
+
+def create_tasks(db: Session, rows: list) -> list:
+    """
+    Inserts many tasks in one transaction, using multi-row INSERTs of INSERT_BATCH rows.
+    Each row is a dict of Task columns; returns the created tasks.
+    """
+    created = []
+    for start in range(0, len(rows), INSERT_BATCH):
+        created.extend(db.scalars(insert(Task).returning(Task), rows[start:start + INSERT_BATCH]))
+    db.commit()
+    return created
+
+def bulk_update_status(db: Session, status: str, first_id: int = None, last_id: int = None,
+                       portfolio_id: int = None, current_status: str = None, limit: int = None):
+    """
+    Sets the status of every task matching the filters with a single UPDATE.
+    Returns [(task, old_status), ...] for the tasks that changed, or None (and changes nothing)
+    if more than `limit` tasks match.
+    """
+    filters = [Task.status != status]
+    if first_id is not None:
+        filters.append(Task.task_id >= first_id)
+    if last_id is not None:
+        filters.append(Task.task_id <= last_id)
+    if portfolio_id:
+        filters.append(Task.portfolio_id == portfolio_id)
+    if current_status:
+        filters.append(Task.status == current_status)
+
+    query = db.query(Task).filter(*filters).order_by(Task.task_id).with_for_update()
+    if limit is not None:
+        query = query.limit(limit + 1)
+    tasks = query.all()
+    if limit is not None and len(tasks) > limit:
+        return None
+    if not tasks:
+        return []
+
+    changed = [(task, task.status) for task in tasks]
+    task_ids = [task.task_id for task in tasks]
+    for start in range(0, len(task_ids), INSERT_BATCH):
+        db.execute(
+            update(Task).where(Task.task_id.in_(task_ids[start:start + INSERT_BATCH])).values(status=status),
+            execution_options={"synchronize_session": False},
+        )
+    db.commit()
+    # The objects were loaded before the UPDATE; show the new status without marking them dirty
+    for task, _ in changed:
+        set_committed_value(task, "status", status)
+    return changed
+
+def rebuild_status_counts(db: Session):
+    """Recomputes every status count from the tasks table."""
+    rows = (
+        db.query(func.coalesce(Task.portfolio_id, 0), Task.status, func.count(Task.task_id))
+        .filter(Task.status.isnot(None))
+        .group_by(func.coalesce(Task.portfolio_id, 0), Task.status)
+        .all()
+    )
+    db.query(TaskStatusCount).delete()
+    db.add_all(TaskStatusCount(portfolio_id=pid, status=status, count=count) for pid, status, count in rows)
+    db.commit()
+
+def count_tasks_by_status(db: Session, portfolio_id: int = None) -> dict:
+    """Reads the per-status task counts, for one portfolio or summed over all of them, from the counters table."""
+    query = db.query(TaskStatusCount.status, func.sum(TaskStatusCount.count))
+    if portfolio_id:
+        query = query.filter(TaskStatusCount.portfolio_id == portfolio_id)
+    return {status: int(count) for status, count in query.group_by(TaskStatusCount.status).all()}
+
+def fetch_task_page(db: Session, status: str, portfolio_id: int = None, after: tuple = None, limit: int = 10) -> list:
+    """
+    Returns up to `limit` tasks with the given status as TaskListRow, ordered by (deadline, task_id),
+    starting after the (deadline, task_id) key `after`. Served by the keyset indexes on tasks.
+    """
+    query = db.query(*LIST_COLUMNS).filter(Task.status == status)
+    if portfolio_id:
+        query = query.filter(Task.portfolio_id == portfolio_id)
+    if after is not None:
+        query = query.filter(tuple_(Task.deadline, Task.task_id) > tuple_(*after))
+    return list_rows(query.order_by(Task.deadline, Task.task_id).limit(limit))
+
+def get_tasks(db: Session, task_ids: list) -> list:
+    return db.query(Task).filter(Task.task_id.in_(task_ids)).all()
+
+def get_task_rows(db: Session, task_ids: list) -> list:
+    """Returns the given tasks as TaskListRow, in no particular order."""
+    return list_rows(db.query(*LIST_COLUMNS).filter(Task.task_id.in_(task_ids)))
+
+def get_reminder_rows(db: Session, task_ids: list) -> list:
+    """Returns the given tasks as TaskReminderRow, in no particular order."""
+    return reminder_rows(db.query(*REMINDER_COLUMNS).filter(Task.task_id.in_(task_ids)))
+
+def iter_task_labels(db: Session, batch: int = 5000):
+    """Streams (task_id, title, status) of every task, for the autocomplete index."""
+    yield from db.query(Task.task_id, Task.title, Task.status).yield_per(batch)
+
+EXPORT_COLUMNS = (
+    Task.task_id, Task.title, Task.description, Task.status, Task.priority,
+    Task.deadline, Task.portfolio_id, Task.created_at, Task.updated_at,
+)
+
+def iter_tasks(db: Session, portfolio_id: int = None, status: str = None, due_after: datetime = None,
+               due_before: datetime = None, batch: int = 1000):
+    """
+    Streams the EXPORT_COLUMNS of matching tasks in task_id order, as rows.
+    Uses a server-side cursor where the driver has one, so memory use does not grow with the table.
+    """
+    query = db.query(*EXPORT_COLUMNS)
+    if portfolio_id:
+        query = query.filter(Task.portfolio_id == portfolio_id)
+    if status:
+        query = query.filter(Task.status == status)
+    if due_after is not None:
+        query = query.filter(Task.deadline >= due_after)
+    if due_before is not None:
+        query = query.filter(Task.deadline < due_before)
+    yield from query.order_by(Task.task_id).execution_options(stream_results=True).yield_per(batch)
+
+def upcoming_deadlines(db: Session, start: datetime, end: datetime) -> list:
+    """Returns (task_id, deadline) for every task due in [start, end), using the deadline index."""
+    return (
+        db.query(Task.task_id, Task.deadline)
+        .filter(Task.deadline >= start, Task.deadline < end)
+        .all()
+    )
+
+def get_state(db: Session, key: str):
+    row = db.get(BotState, key)
+    return row.value if row else None
+
+def set_state(db: Session, key: str, value: str):
+    stmt = dialect_insert(BotState).values(key=key, value=value, updated_at=datetime.now())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[BotState.key],
+        set_={"value": stmt.excluded.value, "updated_at": stmt.excluded.updated_at},
+    )
+    db.execute(stmt)
+    db.commit()
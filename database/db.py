@@ -1,9 +1,95 @@
-from sqlalchemy import create_engine
+import asyncio
+import contextvars
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, inspect
 from sqlalchemy.orm import sessionmaker
-from config import DATABASE_URL
+from sqlalchemy.dialects import postgresql, sqlite
+from config import DATABASE_URL, DB_WORKERS
+from database.models import Base
+from utils.metrics import gauge, histogram
+from utils.instrumentation import instrument_engine, span
 
 # Create database engine
 engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+instrument_engine(engine)
 
-# Create session class for database connections
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Create session class for database connections.
+# Objects stay readable after commit, since sessions are closed before results reach the cogs.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Bounded pool of threads that run all blocking database work off the event loop
+db_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="db")
+
+executor_wait = histogram("taskbot_db_executor_wait_seconds", "Time database calls wait for a free worker thread")
+checkout_wait = histogram("taskbot_db_pool_checkout_seconds", "Time taken to check a connection out of the pool")
+gauge("taskbot_db_pool_checked_out", "Connections currently checked out of the pool",
+      fn=lambda: engine.pool.checkedout() if hasattr(engine.pool, "checkedout") else None)
+gauge("taskbot_db_executor_queue", "Database calls waiting for a worker thread", fn=lambda: db_executor._work_queue.qsize())
+
+def init_db():
+    """
+    Creates any missing tables and indexes.
+    Indexes are also created on tables that already exist, so new indexes reach existing deployments.
+    """
+    had_counts = inspect(engine).has_table("task_status_counts")
+    Base.metadata.create_all(bind=engine)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    if engine.dialect.name == "postgresql":
+        # Expression indexes for /search_tasks that the ORM models cannot describe portably
+        from database.search import create_search_indexes
+        with engine.begin() as connection:
+            create_search_indexes(connection)
+    if engine.dialect.name in ("postgresql", "sqlite"):
+        # Triggers that feed change_log, which replicas follow to keep their caches current, and the status counters
+        from database.change_log import create_change_triggers
+        with engine.begin() as connection:
+            create_change_triggers(connection)
+
+    if not had_counts:
+        # Backfill the status counters the first time they are created
+        from database.crud import rebuild_status_counts
+        _with_session(rebuild_status_counts)
+
+def dialect_insert(model):
+    """Returns an INSERT for the configured database that supports ON CONFLICT clauses."""
+    if engine.dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+def _timed_call(submitted: float, fn, *args, **kwargs):
+    executor_wait.observe(time.perf_counter() - submitted)
+    return fn(*args, **kwargs)
+
+async def run_sync(fn, *args, **kwargs):
+    """Runs a blocking function in the database thread pool and awaits its result."""
+    loop = asyncio.get_running_loop()
+    # Carry the caller's context into the worker thread so SQL timings land in the right command trace
+    context = contextvars.copy_context()
+    call = functools.partial(_timed_call, time.perf_counter(), fn, *args, **kwargs)
+    return await loop.run_in_executor(db_executor, context.run, call)
+
+def _with_session(fn, *args, **kwargs):
+    db = SessionLocal()
+    try:
+        # Check the connection out up front so pool waits are measured separately from the query
+        started = time.perf_counter()
+        db.connection()
+        checkout_wait.observe(time.perf_counter() - started)
+        return fn(db, *args, **kwargs)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+async def run_db(fn, *args, **kwargs):
+    """
+    Runs fn(session, *args, **kwargs) in the database thread pool.
+    Each call gets its own session, which is rolled back on error and always closed.
+    """
+    with span("db"):
+        return await run_sync(_with_session, fn, *args, **kwargs)
@@ -0,0 +1,43 @@
+# database/lease.py
+# Lease rows used for leader election between replicas. Times are naive UTC from the replicas' clocks,
+# so the clocks must roughly agree (NTP is plenty); the lease TTL absorbs small differences.
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import case, delete, or_, select
+from sqlalchemy.orm import Session
+from database.db import dialect_insert
+from database.models import Lease
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def acquire_lease(db: Session, name: str, holder: str, ttl: timedelta) -> bool:
+    """
+    Takes the lease if it is free or expired, or renews it if `holder` already has it, in one atomic upsert.
+    Returns True if `holder` owns the lease until now + ttl.
+    """
+    now = utcnow()
+    stmt = dialect_insert(Lease).values(name=name, holder=holder, acquired_at=now, expires_at=now + ttl)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Lease.name],
+        set_={
+            "holder": stmt.excluded.holder,
+            # Renewals keep the original acquisition time
+            "acquired_at": case((Lease.holder == holder, Lease.acquired_at), else_=stmt.excluded.acquired_at),
+            "expires_at": stmt.excluded.expires_at,
+        },
+        where=or_(Lease.holder == holder, Lease.expires_at < now),
+    ).returning(Lease.holder)
+    owner = db.execute(stmt).scalar_one_or_none()
+    db.commit()
+    return owner == holder
+
+def release_lease(db: Session, name: str, holder: str):
+    """Gives the lease up, if `holder` still has it, so another replica can take over without waiting for it to expire."""
+    db.execute(delete(Lease).where(Lease.name == name, Lease.holder == holder))
+    db.commit()
+
+def lease_holder(db: Session, name: str):
+    """Returns the replica id holding an unexpired lease, or None."""
+    return db.execute(
+        select(Lease.holder).where(Lease.name == name, Lease.expires_at >= utcnow())
+    ).scalar_one_or_none()
@@ -0,0 +1,45 @@
+# database/ledger.py
+from datetime import date, datetime
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+from database.db import dialect_insert
+from database.models import ReminderDelivery
+
+def claim_reminders(db: Session, kind: str, fire_date: date, task_ids: list) -> set:
+    """
+    Records the given reminders as delivered in a single multi-row insert.
+    Returns the ids that were not already in the ledger; only those should be sent.
+    """
+    if not task_ids:
+        return set()
+    now = datetime.now()
+    stmt = (
+        dialect_insert(ReminderDelivery)
+        .values([
+            {"task_id": task_id, "reminder_kind": kind, "fire_date": fire_date, "delivered_at": now}
+            for task_id in task_ids
+        ])
+        .on_conflict_do_nothing()
+        .returning(ReminderDelivery.task_id)
+    )
+    claimed = set(db.execute(stmt).scalars().all())
+    db.commit()
+    return claimed
+
+def release_reminders(db: Session, kind: str, fire_date: date, task_ids: list):
+    """Removes claims for reminders that could not be sent, so they are retried on the next tick."""
+    if not task_ids:
+        return
+    db.execute(
+        delete(ReminderDelivery).where(
+            ReminderDelivery.reminder_kind == kind,
+            ReminderDelivery.fire_date == fire_date,
+            ReminderDelivery.task_id.in_(task_ids),
+        )
+    )
+    db.commit()
+
+def prune_reminders(db: Session, before: date):
+    """Deletes ledger rows for reminders that fired before the given date."""
+    db.execute(delete(ReminderDelivery).where(ReminderDelivery.fire_date < before))
+    db.commit()
@@ -1,5 +1,5 @@
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, String, Text, TIMESTAMP
+from sqlalchemy import BigInteger, Column, Integer, String, Text, TIMESTAMP, Date, Index
 
 Base = declarative_base()
 
@@ -16,7 +16,59 @@ class Task(Base):
     description = Column(Text)
     status = Column(String(50), default="Not Started")
     priority = Column(String(10), default="Low")
-    deadline = Column(TIMESTAMP, nullable=False)
+    deadline = Column(TIMESTAMP, nullable=False, index=True)
     created_at = Column(TIMESTAMP)
     updated_at = Column(TIMESTAMP)
     portfolio_id = Column(Integer)
+
+    __table_args__ = (
+        # Keyset pagination of the task list, per status and optionally per portfolio
+        Index("ix_tasks_status_deadline", "status", "deadline", "task_id"),
+        Index("ix_tasks_portfolio_status_deadline", "portfolio_id", "status", "deadline", "task_id"),
+    )
+
+class ReminderDelivery(Base):
+    """One row per reminder that has been claimed for sending, so restarts and replicas never send it twice."""
+    __tablename__ = "reminder_deliveries"
+    task_id = Column(Integer, primary_key=True)
+    reminder_kind = Column(String(50), primary_key=True)  # e.g. "day_before"
+    fire_date = Column(Date, primary_key=True, index=True)
+    delivered_at = Column(TIMESTAMP)
+
+class TaskStatusCount(Base):
+    """Number of tasks per (portfolio, status), kept up to date by database triggers in the same transaction as task writes."""
+    __tablename__ = "task_status_counts"
+    portfolio_id = Column(Integer, primary_key=True)  # 0 for tasks without a portfolio
+    status = Column(String(50), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class BotState(Base):
+    """Small key/value store for bot bookkeeping that has to survive restarts and be shared by replicas."""
+    __tablename__ = "bot_state"
+    key = Column(String(100), primary_key=True)
+    value = Column(Text)
+    updated_at = Column(TIMESTAMP)
+
+class Lease(Base):
+    """Time-limited ownership of a singleton job, so only one replica runs it; the holder renews it with heartbeats."""
+    __tablename__ = "leases"
+    name = Column(String(100), primary_key=True)
+    holder = Column(String(255), nullable=False)  # Replica id of the current owner
+    acquired_at = Column(TIMESTAMP)               # When the current holder took the lease over
+    expires_at = Column(TIMESTAMP, nullable=False)
+
+class ChangeLogEntry(Base):
+    """
+    One row per changed task or portfolio, written by database triggers (see database/change_log.py),
+    so every replica can follow changes made by the others or directly in the database.
+    change_id increases monotonically and serves as the data version.
+    """
+    __tablename__ = "change_log"
+    # Without AUTOINCREMENT SQLite may reuse the ids of pruned rows
+    __table_args__ = {"sqlite_autoincrement": True}
+    change_id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    entity = Column(String(20), nullable=False)     # "task" or "portfolio"
+    entity_id = Column(Integer, nullable=False)
+    portfolio_id = Column(Integer)                  # Portfolio of a changed task, before and after the change
+    op = Column(String(10), nullable=False)         # "insert", "update" or "delete"
+    changed_at = Column(TIMESTAMP, index=True)      # UTC
@@ -0,0 +1,51 @@
+# database/read_models.py
+# Immutable, column-projected rows for the hot read paths. They are plain tuples: no identity map,
+# no change tracking and no per-instance __dict__, and only the columns the caller reads are selected.
+from datetime import datetime
+from typing import NamedTuple, Optional
+from sqlalchemy import func
+from database.models import Task
+from utils.formatter import DESCRIPTION_PREVIEW
+
+class TaskListRow(NamedTuple):
+    """What the task list and search results show for a task: the columns format_task_entry renders, plus status."""
+    task_id: int
+    title: Optional[str]
+    description: Optional[str]  # At most DESCRIPTION_PREVIEW + 1 characters; format_task_entry cuts the longer ones
+    status: str
+    priority: str
+    deadline: datetime
+    portfolio_id: Optional[int]
+
+class TaskReminderRow(NamedTuple):
+    """What a deadline reminder needs to know about a task."""
+    task_id: int
+    title: Optional[str]
+    deadline: datetime
+    portfolio_id: Optional[int]
+
+# Descriptions are truncated by the database to what a list entry shows, so the rest of a long text is never transferred.
+# One extra character tells format_task_entry the text was cut; the "…" is added there, which keeps plain ASCII
+# descriptions at one byte per character in memory.
+description_preview = func.substr(Task.description, 1, DESCRIPTION_PREVIEW + 1).label("description")
+
+LIST_COLUMNS = (
+    Task.task_id, Task.title, description_preview, Task.status, Task.priority, Task.deadline, Task.portfolio_id,
+)
+REMINDER_COLUMNS = (Task.task_id, Task.title, Task.deadline, Task.portfolio_id)
+
+def list_rows(rows) -> list:
+    """
+    Builds TaskListRow tuples from rows selected with LIST_COLUMNS.
+    Status and priority take a handful of values, so all rows share one string object per value
+    instead of holding a copy each.
+    """
+    shared = {}
+    return [
+        TaskListRow(task_id, title, description, shared.setdefault(status, status),
+                    shared.setdefault(priority, priority), deadline, portfolio_id)
+        for task_id, title, description, status, priority, deadline, portfolio_id in rows
+    ]
+
+def reminder_rows(rows) -> list:
+    return list(map(TaskReminderRow._make, rows))
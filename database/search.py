@@ -0,0 +1,72 @@
+# database/search.py
+# Task search queries. On PostgreSQL searches run against a full-text (and, if pg_trgm is
+# installed, trigram) index; other databases are searched through utils/search_index.py.
+from datetime import datetime
+from sqlalchemy import func, text, or_, literal_column
+from sqlalchemy.orm import Session
+from database.models import Task
+from database.read_models import LIST_COLUMNS, list_rows
+
+# Text search configuration: "simple" does not stem, so it works for any language and for names
+TS_CONFIG = "simple"
+
+SEARCH_INDEX_DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_tasks_search ON tasks USING gin "
+    f"(to_tsvector('{TS_CONFIG}', coalesce(title, '') || ' ' || coalesce(description, '')))"
+)
+TRIGRAM_INDEX_DDL = "CREATE INDEX IF NOT EXISTS ix_tasks_title_trgm ON tasks USING gin (title gin_trgm_ops)"
+
+def search_document():
+    """The indexed tsvector expression; it is written with literals so it matches SEARCH_INDEX_DDL and uses the index."""
+    empty, space = literal_column("''"), literal_column("' '")
+    return func.to_tsvector(
+        literal_column(f"'{TS_CONFIG}'::regconfig"),
+        func.coalesce(Task.title, empty).concat(space).concat(func.coalesce(Task.description, empty)),
+    )
+
+def create_search_indexes(connection):
+    """Creates the PostgreSQL search indexes. The trigram index is skipped if pg_trgm cannot be enabled."""
+    connection.execute(text(SEARCH_INDEX_DDL))
+    try:
+        with connection.begin_nested():
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            connection.execute(text(TRIGRAM_INDEX_DDL))
+    except Exception as e:
+        print(f"Trigram search index not created, fuzzy title matching is disabled: {e}")
+
+def has_trigram(db: Session) -> bool:
+    return db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is not None
+
+def search_tasks(db: Session, terms: list, portfolio_id: int = None, status: str = None,
+                 due_after: datetime = None, due_before: datetime = None, limit: int = 10,
+                 trigram: bool = False) -> list:
+    """
+    Returns up to `limit` tasks (as TaskListRow) matching every term (as a word prefix) in the title or description,
+    best match first. With pg_trgm, titles similar to the query also match, to tolerate typos.
+    """
+    document = search_document()
+    query_ts = func.to_tsquery(literal_column(f"'{TS_CONFIG}'::regconfig"), " & ".join(f"{term}:*" for term in terms))
+    rank = func.ts_rank_cd(document, query_ts)
+    match = document.op("@@")(query_ts)
+    if trigram:
+        phrase = " ".join(terms)
+        match = or_(match, Task.title.op("%")(phrase))
+        rank = rank + func.similarity(Task.title, phrase)
+
+    query = db.query(*LIST_COLUMNS).filter(match)
+    if portfolio_id:
+        query = query.filter(Task.portfolio_id == portfolio_id)
+    if status:
+        query = query.filter(Task.status == status)
+    if due_after is not None:
+        query = query.filter(Task.deadline >= due_after)
+    if due_before is not None:
+        query = query.filter(Task.deadline < due_before)
+    return list_rows(query.order_by(rank.desc(), Task.deadline, Task.task_id).limit(limit))
+
+def iter_search_rows(db: Session, batch: int = 5000):
+    """Streams (task_id, title, description, portfolio_id, status, deadline) for building the in-process index."""
+    yield from (
+        db.query(Task.task_id, Task.title, Task.description, Task.portfolio_id, Task.status, Task.deadline)
+        .yield_per(batch)
+    )
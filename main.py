@@ -1,26 +1,112 @@
 import discord
+from discord import app_commands
 from discord.ext import commands
 from config import DISCORD_TOKEN
 import os
+import asyncio
+import time
 from utils.http_server import start_http_server
+from database.db import init_db, run_sync
+from utils.portfolio_cache import PortfolioCache
+from utils.notifier import NotificationDispatcher
+from utils.metrics import gauge, histogram
+from utils.instrumentation import StallDetector
+from utils.command_sync import sync_commands
+from utils.leader import LeaderElection
+from utils.change_feed import ChangeFeed
+
+command_latency = histogram(
+    "taskbot_command_latency_seconds", "Time from an interaction being created to its command finishing",
+    ("command", "outcome")
+)
+cog_load_seconds = gauge("taskbot_cog_load_seconds", "Time taken to import and set up each cog at startup", ("cog",))
+startup_seconds = gauge("taskbot_startup_seconds", "Time taken by setup_hook on the last start")
+
+def observe_command_latency(interaction: discord.Interaction, command, outcome: str):
+    latency = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+    command_latency.observe(latency, command=command.qualified_name if command else "unknown", outcome=outcome)
+
+def error_outcome(error: app_commands.AppCommandError) -> str:
+    """"timeout" when the command gave up waiting or answered too late for Discord, otherwise "error"."""
+    original = getattr(error, "original", error)
+    if isinstance(original, asyncio.TimeoutError):
+        return "timeout"
+    # 10062 Unknown interaction: the response came after Discord's 3 second window
+    if isinstance(original, discord.NotFound) and original.code == 10062:
+        return "timeout"
+    return "error"
+
+class TaskCommandTree(app_commands.CommandTree):
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        # on_app_command_completion only fires on success; failures are usually the slowest commands
+        observe_command_latency(interaction, interaction.command, error_outcome(error))
+        await super().on_error(interaction, error)
 
 class MyBot(commands.Bot):
     async def setup_hook(self):
-        # Automatically load cogs
-        for filename in os.listdir("./cogs"):
+        setup_started = time.perf_counter()
+        # Bind the port first so the host sees the process listening; /healthz reports "starting" until setup is done
+        self.setup_done = False
+        self.http_runner = await start_http_server(self)
+        # Report anything that blocks the event loop, with the stack that is blocking it
+        self.stall_detector = StallDetector(asyncio.get_running_loop())
+        self.stall_detector.start()
+        # Create any missing tables and indexes
+        await run_sync(init_db)
+        # Every replica serves interactions, but only the holder of this lease runs the reminder scheduler
+        self.leader = LeaderElection("scheduler")
+        self.leader.start()
+        # Warm the portfolio routing cache before any command or reminder needs it
+        self.portfolios = PortfolioCache(self)
+        self.portfolios.attach()
+        await self.portfolios.refresh()
+        # Changes made through other replicas or directly in the database are followed from the change log.
+        # The position is taken before the cogs load their caches, so nothing written meanwhile is missed.
+        self.changes = ChangeFeed(self)
+        await self.changes.open()
+        # Channel notifications are paced and sent in the background
+        self.notifier = NotificationDispatcher()
+        gauge("taskbot_notification_queue_depth", "Channel notifications waiting to be sent", fn=self.notifier.queue_depth)
+        # Automatically load cogs, timing each one so slow imports show up in cold-start numbers
+        for filename in sorted(os.listdir("./cogs")):
             if filename.endswith(".py") and filename != "__init__.py":
+                started = time.perf_counter()
                 await self.load_extension(f"cogs.{filename[:-3]}")
-        await self.tree.sync()
+                elapsed = time.perf_counter() - started
+                cog_load_seconds.set(elapsed, cog=filename[:-3])
+                print(f"Loaded cog {filename[:-3]} in {elapsed * 1000:.0f}ms")
+        self.changes.start()
+        # Only push the slash commands to Discord when their definitions changed
+        await sync_commands(self)
+        self.setup_done = True
+        startup_seconds.set(time.perf_counter() - setup_started)
+
+    async def on_app_command_completion(self, interaction: discord.Interaction, command):
+        observe_command_latency(interaction, command, "ok")
+
+    async def close(self):
+        # Give queued notifications a chance to go out before disconnecting
+        if hasattr(self, "notifier"):
+            await self.notifier.close()
+        if hasattr(self, "changes"):
+            await self.changes.stop()
+        if hasattr(self, "leader"):
+            await self.leader.stop()
+        if hasattr(self, "http_runner"):
+            await self.http_runner.cleanup()
+        if hasattr(self, "stall_detector"):
+            self.stall_detector.stop()
+        await super().close()
 
 intents = discord.Intents.default()
 intents.message_content = True
 
-bot = MyBot(command_prefix="!", intents=intents)
+bot = MyBot(command_prefix="!", intents=intents, tree_cls=TaskCommandTree)
 
 @bot.event
 async def on_ready():
     print(f"Logged in as {bot.user} (ID: {bot.user.id})")
 
-start_http_server()
-
-bot.run(DISCORD_TOKEN)
+# Post-processing worker processes import this module too; only the main process runs the bot
+if __name__ == "__main__":
+    bot.run(DISCORD_TOKEN)
@@ -0,0 +1,184 @@
+# utils/change_feed.py
+import asyncio
+import select
+import threading
+import time
+from datetime import timedelta
+from config import CHANGE_POLL_SECONDS
+from database.db import engine, run_db
+from database import crud
+from database.change_log import NOTIFY_CHANNEL, latest_change_id, fetch_changes, prune_changes
+from database.lease import utcnow
+from utils.metrics import counter, gauge
+
+# Change log entries read per query
+CHANGE_BATCH = 1000
+# A missing change_id is waited for this long, since its transaction may still commit; then it is skipped as rolled back
+GAP_TIMEOUT = 30
+# Change log entries are kept this long, and pruned by the scheduler leader once per PRUNE_INTERVAL seconds
+CHANGE_RETENTION = timedelta(days=1)
+PRUNE_INTERVAL = 3600
+
+changes_applied = counter("taskbot_changes_applied_total", "Change log entries applied to in-process caches", ("entity",))
+
+class ChangeCursor:
+    """
+    Position in the change log. Ids are assigned when a change is logged but become visible when its
+    transaction commits, so a later id can be read before an earlier one. The position only moves past
+    an id once it has been read, or once it has been missing for `gap_timeout` seconds.
+    """
+    def __init__(self, position: int, gap_timeout: float = GAP_TIMEOUT):
+        self.position = position   # Every change up to and including this id has been handled
+        self.gap_timeout = gap_timeout
+        self._seen = set()         # Handled ids above position
+        self._gap = None           # (highest id read, time) when ids below it were first found missing
+
+    def unhandled(self, change_ids) -> set:
+        """Returns the ids read from the log that were not handled before."""
+        return {change_id for change_id in change_ids if change_id > self.position and change_id not in self._seen}
+
+    def accept(self, change_ids):
+        """Records ids as handled. Call once they have been applied, so a failed batch is read again."""
+        self._seen.update(change_id for change_id in change_ids if change_id > self.position)
+        self._advance()
+
+    def _advance(self):
+        while self.position + 1 in self._seen:
+            self._seen.remove(self.position + 1)
+            self.position += 1
+        if self._gap is not None and self.position >= self._gap[0]:
+            self._gap = None
+        if not self._seen:
+            return
+        now = time.monotonic()
+        if self._gap is None:
+            self._gap = (max(self._seen), now)
+        elif now - self._gap[1] >= self.gap_timeout:
+            # Whatever is still missing up to the boundary belonged to transactions that rolled back
+            boundary = self._gap[0]
+            self._seen = {change_id for change_id in self._seen if change_id > boundary}
+            self.position = boundary
+            self._gap = None
+            self._advance()
+
+class ChangeFeed:
+    """
+    Follows change_log, which database triggers fill on every task and portfolio write, whichever replica
+    or tool made it. Changed tasks are reloaded and dispatched as "task_changed" (task, portfolio_ids)
+    or "task_deleted" (task_id, portfolio_ids); portfolio changes reload the portfolio cache.
+    Listeners patch their caches from these events. Changes made by this replica come back through the
+    feed as well; applying them twice is harmless.
+    """
+    def __init__(self, bot, poll_interval: float = CHANGE_POLL_SECONDS):
+        self.bot = bot
+        self.poll_interval = poll_interval
+        self.cursor = None
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._stopping = threading.Event()
+        self._last_prune = 0.0
+        gauge("taskbot_change_feed_position", "Last change_log id applied by this replica",
+              fn=lambda: self.cursor.position if self.cursor else None)
+
+    async def open(self):
+        """Starts the feed at the current end of the log. Call before caches are loaded, so no change is missed."""
+        self.cursor = ChangeCursor(await run_db(latest_change_id))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run(), name="change-feed")
+        if engine.dialect.name == "postgresql":
+            loop = asyncio.get_running_loop()
+            threading.Thread(target=self._listen, args=(loop,), name="change-listener", daemon=True).start()
+
+    async def stop(self):
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.poll()
+                await self._prune()
+            except Exception as e:
+                print(f"Error reading the change log: {e!r}")
+
+    async def poll(self):
+        """Reads the changes logged since the last poll and dispatches them."""
+        # Pages through the whole log above the position: while a gap is open, the ids already handled above it
+        # are read again, and may fill more than one batch
+        after = self.cursor.position
+        while True:
+            rows = await run_db(fetch_changes, after, CHANGE_BATCH)
+            new_ids = self.cursor.unhandled(row.change_id for row in rows)
+            if new_ids:
+                await self._apply([row for row in rows if row.change_id in new_ids])
+            # Only moved past once applied; if _apply raised, the same rows are read again on the next poll
+            self.cursor.accept(new_ids)
+            if len(rows) < CHANGE_BATCH:
+                return
+            after = rows[-1].change_id
+
+    async def _apply(self, rows: list):
+        task_portfolios = {}   # task_id -> ids of the portfolios whose task lists changed
+        portfolios_changed = False
+        for row in rows:
+            if row.entity == "task":
+                task_portfolios.setdefault(row.entity_id, set()).add(row.portfolio_id)
+            elif row.entity == "portfolio":
+                portfolios_changed = True
+            changes_applied.inc(entity=row.entity)
+
+        if portfolios_changed:
+            await self.bot.portfolios.refresh()
+        if task_portfolios:
+            # Reload the current state rather than trusting the log, which only says that something changed
+            tasks = await run_db(crud.get_tasks, list(task_portfolios))
+            for task in tasks:
+                portfolio_ids = task_portfolios.pop(task.task_id)
+                portfolio_ids.add(task.portfolio_id)
+                self.bot.dispatch("task_changed", task, portfolio_ids)
+            for task_id, portfolio_ids in task_portfolios.items():
+                self.bot.dispatch("task_deleted", task_id, portfolio_ids)
+
+    async def _prune(self):
+        leader = getattr(self.bot, "leader", None)
+        if leader is None or not leader.is_leader or time.monotonic() - self._last_prune < PRUNE_INTERVAL:
+            return
+        self._last_prune = time.monotonic()
+        await run_db(prune_changes, utcnow() - CHANGE_RETENTION)
+
+    def _listen(self, loop: asyncio.AbstractEventLoop):
+        """Runs in its own thread on PostgreSQL: waits for NOTIFY on a dedicated connection and wakes the poller."""
+        while not self._stopping.is_set():
+            connection = None
+            try:
+                # Detached from the pool: this connection stays in LISTEN mode for as long as the bot runs
+                connection = engine.raw_connection()
+                connection.detach()
+                dbapi_connection = connection.driver_connection
+                dbapi_connection.autocommit = True
+                with dbapi_connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                while not self._stopping.is_set():
+                    if select.select([dbapi_connection], [], [], 5)[0]:
+                        dbapi_connection.poll()
+                        if dbapi_connection.notifies:
+                            dbapi_connection.notifies.clear()
+                            loop.call_soon_threadsafe(self._wakeup.set)
+            except Exception as e:
+                print(f"Change notifications unavailable, relying on polling: {e!r}")
+                self._stopping.wait(30)
+            finally:
+                if connection is not None:
+                    connection.close()
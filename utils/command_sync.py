@@ -0,0 +1,32 @@
+# utils/command_sync.py
+import hashlib
+import json
+from discord import app_commands
+from config import COMMAND_SYNC
+from database.db import run_db
+from database import crud
+
+def command_tree_hash(tree: app_commands.CommandTree) -> str:
+    """Hash of the global command definitions exactly as they would be sent to Discord."""
+    payload = sorted((command.to_dict(tree) for command in tree.get_commands()),
+                     key=lambda command: (command.get("type", 1), command["name"]))
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+async def sync_commands(bot, mode: str = COMMAND_SYNC) -> bool:
+    """
+    Pushes the command tree to Discord if it differs from the last synced one.
+    Syncing is a rate-limited remote call, so restarts and rolling deploys skip it while the commands are unchanged.
+    The hash of the last sync is kept in the database, so it is shared by all replicas.
+    Returns True if the commands were synced.
+    """
+    if mode == "never":
+        return False
+    key = f"command_tree_hash:{bot.application_id}"
+    current = command_tree_hash(bot.tree)
+    if mode != "always" and await run_db(crud.get_state, key) == current:
+        print("Slash commands unchanged, skipping sync")
+        return False
+    await bot.tree.sync()
+    await run_db(crud.set_state, key, current)
+    print("Slash commands synced")
+    return True
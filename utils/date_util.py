@@ -1,21 +1,205 @@
 # utils/date_util.py
-from datetime import datetime
+import calendar
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from config import TIMEZONE
 
-def parse_date(date_str: str) -> datetime:
+WEEKDAYS = {
+    "mon": 0, "monday": 0, "tue": 1, "tues": 1, "tuesday": 1, "wed": 2, "wednesday": 2,
+    "thu": 3, "thur": 3, "thurs": 3, "thursday": 3, "fri": 4, "friday": 4,
+    "sat": 5, "saturday": 5, "sun": 6, "sunday": 6,
+}
+# Day offsets of the named relative days
+RELATIVE_DAYS = {"today": 0, "tomorrow": 1, "tmr": 1}
+# Units accepted by "+3d" and "in 3 days"
+UNITS = {
+    "d": "days", "day": "days", "days": "days",
+    "w": "weeks", "wk": "weeks", "week": "weeks", "weeks": "weeks",
+    "h": "hours", "hr": "hours", "hour": "hours", "hours": "hours",
+    "min": "minutes", "mins": "minutes", "minute": "minutes", "minutes": "minutes",
+}
+UTC_NAMES = ("utc", "gmt", "z")
+
+@lru_cache(maxsize=64)
+def _zone(name: str):
+    """Returns the tzinfo for an IANA name, or None if it is unknown. Lookups are cached, including misses."""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+def bot_timezone():
+    """The timezone deadlines are stored and shown in: TIMEZONE if configured, otherwise the server's local time."""
+    return _zone(TIMEZONE) if TIMEZONE else None
+
+def local_now() -> datetime:
+    """Current time as a naive datetime in the bot's timezone, comparable with stored deadlines."""
+    zone = bot_timezone()
+    return datetime.now(zone).replace(tzinfo=None) if zone else datetime.now()
+
+def _to_local(moment: datetime) -> datetime:
+    """Converts an aware datetime to a naive one in the bot's timezone."""
+    zone = bot_timezone()
+    return (moment.astimezone(zone) if zone else moment.astimezone()).replace(tzinfo=None)
+
+def _number(text: str, min_len: int, max_len: int):
+    return int(text) if text.isdigit() and text.isascii() and min_len <= len(text) <= max_len else None
+
+def _parse_time(token: str):
+    """Parses "17:30", "9:05", "9:5", "5pm" or "5:30pm" into (hour, minute), or None."""
+    suffix = None
+    if token.endswith(("am", "pm")):
+        token, suffix = token[:-2], token[-2:]
+    hour_text, sep, minute_text = token.partition(":")
+    hour = _number(hour_text, 1, 2)
+    minute = _number(minute_text, 1, 2) if sep else (0 if suffix else None)
+    if hour is None or minute is None or minute > 59:
+        return None
+    if suffix:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if suffix == "pm" else 0)
+    return (hour, minute) if hour <= 23 else None
+
+def _parse_zone(token: str):
+    """Parses "UTC", "Z", "+05:30", "-0800" or an IANA name such as "Europe/London" into a tzinfo, or None."""
+    if token in UTC_NAMES:
+        return timezone.utc
+    if token[0] in "+-":
+        digits = token[1:].replace(":", "")
+        hours, minutes = _number(digits[:2], 2, 2), _number(digits[2:] or "00", 2, 2)
+        if hours is None or minutes is None or len(digits) not in (2, 4) or hours > 14 or minutes > 59:
+            return None
+        offset = timedelta(hours=hours, minutes=minutes)
+        return timezone(-offset if token[0] == "-" else offset)
+    if "/" in token and any(c.isalpha() for c in token):
+        # Zone names are case-sensitive on disk; the input was lowercased, so restore the usual capitalisation
+        return _zone("/".join(part.title() if part.isalpha() else part.replace("_", " ").title().replace(" ", "_")
+                              for part in token.split("/")))
+    return None
+
+def _parse_day(token: str):
+    """Parses "DD/MM/YYYY" (one-digit day and month allowed) into (year, month, day), or None."""
+    parts = token.split("/")
+    if len(parts) != 3:
+        return None
+    day, month, year = _number(parts[0], 1, 2), _number(parts[1], 1, 2), _number(parts[2], 4, 4)
+    if day is None or month is None or year is None or not 1 <= month <= 12 or year < 1:
+        return None
+    if not 1 <= day <= calendar.monthrange(year, month)[1]:
+        return None
+    return year, month, day
+
+@lru_cache(maxsize=512)
+def _parse_spec(text: str):
     """
-    Parses a date string, supporting the following formats:
-    - "DD/MM/YYYY HH:MM"
-    - "DD/MM/YYYY" (defaults to 00:00)
-    Returns None if parsing fails.
+    Parses normalized input into a description of the date that does not depend on the current time:
+    ("date", (y, m, d), time, zone), ("offset", days, time, zone), ("weekday", weekday, strictly_after, time, zone)
+    or ("delta", timedelta). Returns None if the input is not understood.
+    Cached, so repeated inputs (bulk imports, autocomplete) are parsed once.
     """
-    formats = ["%d/%m/%Y %H:%M", "%d/%m/%Y"]
-    for fmt in formats:
-        try:
-            dt = datetime.strptime(date_str, fmt)
-            # If only the date is entered, the default time is 00:00
-            if fmt == "%d/%m/%Y":
-                dt = dt.replace(hour=0, minute=0)
-            return dt
-        except ValueError:
-            continue
+    tokens = text.split()
+    if not tokens:
+        return None
+
+    # "+3d", "+2w", "+4h"
+    if len(tokens) == 1 and tokens[0].startswith("+"):
+        body = tokens[0][1:]
+        digits = len(body) - len(body.lstrip("0123456789"))
+        amount, unit = _number(body[:digits], 1, 4), UNITS.get(body[digits:])
+        return ("delta", timedelta(**{unit: amount})) if amount is not None and unit else None
+    # "in 3 days", "in 2 hours"
+    if tokens[0] == "in":
+        if len(tokens) != 3:
+            return None
+        amount, unit = _number(tokens[1], 1, 4), UNITS.get(tokens[2])
+        return ("delta", timedelta(**{unit: amount})) if amount is not None and unit else None
+
+    # Optional trailing zone, then optional time (with an optional "at" before it)
+    zone = None
+    if len(tokens) > 1:
+        zone = _parse_zone(tokens[-1])
+        if zone is not None:
+            tokens = tokens[:-1]
+    at_time = _parse_time(tokens[-1]) if len(tokens) > 1 else None
+    if at_time is not None:
+        tokens = tokens[:-1]
+        if len(tokens) > 1 and tokens[-1] == "at":
+            tokens = tokens[:-1]
+
+    first = tokens[0]
+    if len(tokens) == 1:
+        day = _parse_day(first)
+        if day is not None:
+            return ("date", day, at_time, zone)
+        if first in RELATIVE_DAYS:
+            return ("offset", RELATIVE_DAYS[first], at_time, zone)
+        if first in WEEKDAYS:
+            return ("weekday", WEEKDAYS[first], False, at_time, zone)
+        # A bare time means that time today
+        if at_time is None:
+            only_time = _parse_time(first)
+            if only_time is not None:
+                return ("offset", 0, only_time, zone)
+        return None
+    if len(tokens) == 2 and first == "next" and tokens[1] in WEEKDAYS:
+        return ("weekday", WEEKDAYS[tokens[1]], True, at_time, zone)
     return None
+
+def parse_date(date_str: str, now: datetime = None) -> datetime:
+    """
+    Parses a deadline in one pass, without raising for input it does not understand. Accepted forms:
+    - "DD/MM/YYYY HH:MM" and "DD/MM/YYYY" (time defaults to 00:00)
+    - "today", "tomorrow", "fri", "next fri", optionally followed by a time ("tomorrow 17:00", "next fri at 5pm")
+    - "+3d", "+2w", "+4h", "in 3 days"
+    - any of the above followed by a timezone ("UTC", "+02:00", "Europe/London")
+    Relative forms are resolved against `now` (default: now in the bot's timezone). The result is a naive
+    datetime in the bot's timezone, like the stored deadlines. Returns None if parsing fails.
+    """
+    if not date_str:
+        return None
+    spec = _parse_spec(" ".join(date_str.lower().split()))
+    if spec is None:
+        return None
+    if now is None:
+        now = local_now()
+    try:
+        return _resolve(spec, now)
+    except (ValueError, OverflowError):
+        # Dates at the edges of the calendar, e.g. "01/01/0001 00:00 +14:00", cannot be shifted into the bot's timezone
+        return None
+
+def _resolve(spec: tuple, now: datetime) -> datetime:
+    """Turns a parsed spec into a naive datetime in the bot's timezone."""
+    kind = spec[0]
+    if kind == "delta":
+        return now + spec[1]
+
+    at_time, zone = spec[-2], spec[-1]
+    if zone is not None:
+        # Relative days are counted in the given zone
+        today = _aware_now(now).astimezone(zone).date()
+    else:
+        today = now.date()
+    if kind == "date":
+        day = datetime(*spec[1]).date()
+    elif kind == "offset":
+        day = today + timedelta(days=spec[1])
+    else:
+        weekday, strictly_after = spec[1], spec[2]
+        days_ahead = (weekday - today.weekday()) % 7
+        if days_ahead == 0 and strictly_after:
+            days_ahead = 7
+        day = today + timedelta(days=days_ahead)
+
+    hour, minute = at_time or (0, 0)
+    result = datetime(day.year, day.month, day.day, hour, minute)
+    if zone is not None:
+        result = _to_local(result.replace(tzinfo=zone))
+    return result
+
+def _aware_now(now: datetime) -> datetime:
+    """Attaches the bot's timezone to a naive 'now' so it can be converted to another zone."""
+    zone = bot_timezone()
+    return now.replace(tzinfo=zone) if zone else now.astimezone()
@@ -1,4 +1,17 @@
 # utils/formatter.py
+# Mapping status to emoji
+STATUS_EMOJI = {
+    "Not Started": "⏳",
+    "In Progress": "▶️",
+    "Completed": "✅",
+    "Cancelled": "❌"
+}
+
+# Embed field values are limited to 1024 characters.
+FIELD_LIMIT = 1024
+# Longest description shown in a task list entry; longer ones are cut and end with "…"
+DESCRIPTION_PREVIEW = 100
+
 def format_task_list(tasks: list) -> str:
     """
     Receives a list of tasks (each task is a dictionary or object) and returns a formatted string.
@@ -13,3 +26,32 @@ def format_task_list(tasks: list) -> str:
         line = f"Task ID: {task.task_id} | Title: {task.title} | Status: {task.status} | Priority: {task.priority} | Deadline: {task.deadline}"
         lines.append(line)
     return "\n".join(lines)
+
+def format_task_entry(task, department: str = None) -> str:
+    """Formats one task for the task list. The department is only shown when listing all departments."""
+    deadline_str = task.deadline.strftime("%d/%m/%Y %H:%M") if task.deadline else "None"
+    description = task.description or "None"
+    if len(description) > DESCRIPTION_PREVIEW:
+        description = description[:DESCRIPTION_PREVIEW - 1] + "…"
+    entry = (f"**ID:** {task.task_id} | **Title:** {task.title}\n"
+             f"**Description:** {description}\n"
+             f"**Priority:** {task.priority}\n"
+             f"**Deadline:** {deadline_str}")
+    if department is not None:
+        entry += f"\n**Department:** {department}"
+    return entry
+
+def fit_entries(entries: list, max_length: int = FIELD_LIMIT):
+    """
+    Packs as many whole entries as fit into one field value.
+    Returns (text, number of entries used); a single oversized entry is truncated rather than split.
+    """
+    text = ""
+    for used, entry in enumerate(entries):
+        candidate = f"{text}\n\n{entry}" if text else entry
+        if len(candidate) > max_length:
+            if used == 0:
+                return entry[:max_length - 1] + "…", 1
+            return text, used
+        text = candidate
+    return text, len(entries)
@@ -1,30 +1,114 @@
-import http.server
-import socketserver
-import threading
+import asyncio
+import hmac
+import math
+import time
+from aiohttp import web
+from sqlalchemy import text
+from config import EXPORT_TOKEN
+from database.db import engine, run_sync
+from utils.metrics import registry, counter, gauge, histogram
+from utils.task_export import FORMATS, TaskExport, parse_export_filters
 
 PORT = 10000
+# How often the event loop lag is sampled, in seconds
+LAG_INTERVAL = 0.5
+# Readiness fails if the database does not answer within this many seconds
+DB_PING_TIMEOUT = 2
 
-class SimpleHandler(http.server.SimpleHTTPRequestHandler):
-    def do_GET(self):
-        self.send_response(200)
-        self.send_header("Content-Type", "text/plain; charset=utf-8")
-        self.end_headers()
-        self.wfile.write(b"OK")
-    
-    def do_POST(self):
-        self.do_GET()
-
-    def do_PUT(self):
-        self.do_GET()
-
-    def do_DELETE(self):
-        self.do_GET()
-
-def start_http_server():
-    """Starts a simple HTTP server, listening on port 10000"""
-    handler = SimpleHandler
-    httpd = socketserver.TCPServer(("", PORT), handler)
-    # Start the HTTP server in a thread, using a daemon thread to ensure it closes automatically when the main program exits.
-    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
-    thread.start()
+loop_lag_seconds = gauge("taskbot_event_loop_lag_seconds", "Most recent event loop scheduling delay")
+loop_lag_histogram = histogram(
+    "taskbot_event_loop_lag_histogram_seconds", "Event loop scheduling delay",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+exported_rows = counter("taskbot_export_rows_total", "Tasks streamed by /export/tasks", ("format",))
+
+def ping_db():
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+async def monitor_event_loop():
+    """Measures how late a fixed sleep wakes up; the excess is time the loop was busy with something else."""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        lag = max(time.perf_counter() - started - LAG_INTERVAL, 0.0)
+        loop_lag_seconds.set(lag)
+        loop_lag_histogram.observe(lag)
+
+def build_app(bot) -> web.Application:
+    async def ok(request):
+        return web.Response(text="OK")
+
+    async def health(request):
+        # The server starts before the rest of setup_hook, so it answers while caches and cogs are still loading
+        if not getattr(bot, "setup_done", False):
+            return web.Response(text="Starting", status=503)
+        return web.Response(text="OK")
+
+    async def ready(request):
+        gateway = getattr(bot, "setup_done", False) and bot.is_ready() and not bot.is_closed() and math.isfinite(bot.latency)
+        try:
+            await asyncio.wait_for(run_sync(ping_db), timeout=DB_PING_TIMEOUT)
+            database = True
+        except Exception:
+            database = False
+        status = 200 if gateway and database else 503
+        # Leadership is reported for information only; followers are just as ready to serve commands
+        leader = bot.leader.is_leader if hasattr(bot, "leader") else None
+        return web.json_response({"gateway": gateway, "database": database, "leader": leader}, status=status)
+
+    async def metrics(request):
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+
+    async def export_tasks(request):
+        """
+        GET /export/tasks?format=csv|ndjson&portfolio_id=&status=&due_after=&due_before=
+        Streams the matching tasks with chunked transfer encoding, one cursor batch at a time.
+        """
+        if not EXPORT_TOKEN:
+            raise web.HTTPNotFound()
+        if not getattr(bot, "setup_done", False):
+            raise web.HTTPServiceUnavailable(text="Starting")
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {EXPORT_TOKEN}"):
+            raise web.HTTPUnauthorized(headers={"WWW-Authenticate": "Bearer"})
+        fmt = request.query.get("format", "csv").lower()
+        if fmt not in FORMATS:
+            return web.json_response({"error": f"format must be one of {', '.join(FORMATS)}"}, status=400)
+        try:
+            filters = parse_export_filters(request.query)
+        except ValueError as e:
+            return web.json_response({"error": str(e)}, status=400)
+
+        export = await run_sync(TaskExport, fmt, filters, lambda portfolio_id: bot.portfolios.name(portfolio_id, None))
+        try:
+            response = web.StreamResponse(headers={
+                "Content-Type": f"{FORMATS[fmt]}; charset=utf-8",
+                "Content-Disposition": f'attachment; filename="tasks.{fmt}"',
+            })
+            response.enable_chunked_encoding()
+            await response.prepare(request)
+            # Fetch the next batch only once the previous one has been handed to the client
+            while chunk := await run_sync(export.read_chunk):
+                await response.write(chunk)
+            await response.write_eof()
+            return response
+        finally:
+            exported_rows.inc(export.count, format=fmt)
+            await run_sync(export.close)
+
+    app = web.Application()
+    app.router.add_get("/", ok)
+    app.router.add_get("/healthz", health)
+    app.router.add_get("/readyz", ready)
+    app.router.add_get("/metrics", metrics)
+    app.router.add_get("/export/tasks", export_tasks)
+    return app
+
+async def start_http_server(bot) -> web.AppRunner:
+    """Starts the health and metrics server on the bot's event loop, listening on port 10000. Called first in setup_hook."""
+    runner = web.AppRunner(build_app(bot), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, port=PORT).start()
+    bot.loop.create_task(monitor_event_loop())
     print(f"HTTP server started on port {PORT}")
+    return runner
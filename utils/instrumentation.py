@@ -0,0 +1,132 @@
+# utils/instrumentation.py
+# Per-command traces split into phases, SQL timing and an event loop stall detector.
+import contextvars
+import functools
+import random
+import sys
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from sqlalchemy import event
+from config import TRACE_SLOW_MS, TRACE_SAMPLE_RATE, STALL_THRESHOLD_MS
+from utils.metrics import counter, histogram
+
+command_duration = histogram("taskbot_command_duration_seconds", "Time spent inside command callbacks", ("command",))
+phase_duration = histogram("taskbot_command_phase_seconds", "Time spent per command phase", ("command", "phase"))
+sql_duration = histogram("taskbot_sql_seconds", "SQL statement execution time", ("statement",))
+loop_stalls = counter("taskbot_event_loop_stalls_total", "Times the event loop was blocked longer than the stall threshold")
+
+class Trace:
+    """Timing breakdown of a single command invocation."""
+    __slots__ = ("command", "started", "phases", "sql_time", "sql_count")
+
+    def __init__(self, command: str):
+        self.command = command
+        self.started = time.perf_counter()
+        self.phases = []  # (phase, seconds) in the order they finished
+        self.sql_time = 0.0
+        self.sql_count = 0
+
+    def add_phase(self, phase: str, seconds: float):
+        self.phases.append((phase, seconds))
+        phase_duration.observe(seconds, command=self.command, phase=phase)
+
+    def finish(self):
+        total = time.perf_counter() - self.started
+        command_duration.observe(total, command=self.command)
+        # Always report slow calls; report a random sample of the rest
+        if total * 1000 >= TRACE_SLOW_MS or (TRACE_SAMPLE_RATE and random.random() < TRACE_SAMPLE_RATE):
+            breakdown = " ".join(f"{phase}={seconds * 1000:.1f}ms" for phase, seconds in self.phases)
+            print(f"[trace] {self.command} {total * 1000:.1f}ms {breakdown} "
+                  f"sql={self.sql_time * 1000:.1f}ms/{self.sql_count}q")
+
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+@contextmanager
+def span(phase: str):
+    """Times a phase of the current command, e.g. `with span("render"):`. Does nothing outside a command."""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_phase(phase, time.perf_counter() - started)
+
+def instrumented(func):
+    """Decorator for app command callbacks (placed below @app_commands.command) that records a Trace per call."""
+    @functools.wraps(func)
+    async def wrapper(self, interaction, *args, **kwargs):
+        trace = Trace(func.__name__)
+        token = current_trace.set(trace)
+        try:
+            return await func(self, interaction, *args, **kwargs)
+        finally:
+            current_trace.reset(token)
+            trace.finish()
+    return wrapper
+
+def instrument_engine(engine):
+    """Times every SQL statement run by the engine and adds it to the trace of the command that issued it."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        sql_duration.observe(elapsed, statement=statement.lstrip().split(" ", 1)[0].upper())
+        trace = current_trace.get()
+        if trace is not None:
+            trace.sql_time += elapsed
+            trace.sql_count += 1
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # after_cursor_execute does not fire for a statement that raised; drop its start time instead
+        if context.connection is not None and context.execution_context is not None:
+            started = context.connection.info.get("query_started")
+            if started:
+                started.pop()
+
+class StallDetector:
+    """
+    Watchdog thread that notices when the event loop stops turning.
+    The loop refreshes a heartbeat; if the heartbeat is older than the threshold, the stack of the
+    loop's thread is printed once per stall, which shows the code that is blocking it.
+    """
+    def __init__(self, loop, threshold_ms: float = STALL_THRESHOLD_MS):
+        self.loop = loop
+        self.threshold = threshold_ms / 1000
+        self.heartbeat = time.monotonic()
+        self.loop_thread_id = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        self.loop.call_soon_threadsafe(self._beat)
+        threading.Thread(target=self._watch, name="stall-detector", daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _beat(self):
+        self.loop_thread_id = threading.get_ident()
+        self.heartbeat = time.monotonic()
+        if not self._stopped.is_set():
+            self.loop.call_later(self.threshold / 4, self._beat)
+
+    def _watch(self):
+        reported = False
+        while not self._stopped.wait(self.threshold / 4):
+            stalled_for = time.monotonic() - self.heartbeat
+            if stalled_for < self.threshold:
+                reported = False
+            elif not reported and self.loop_thread_id is not None:
+                reported = True
+                loop_stalls.inc()
+                frame = sys._current_frames().get(self.loop_thread_id)
+                stack = "".join(traceback.format_stack(frame)) if frame else "unavailable"
+                print(f"[stall] Event loop blocked for {stalled_for * 1000:.0f}ms, currently at:\n{stack}")
@@ -0,0 +1,100 @@
+# utils/leader.py
+import asyncio
+import os
+import socket
+import time
+import uuid
+from datetime import timedelta
+from config import REPLICA_ID, LEASE_TTL_SECONDS, LEASE_RENEW_SECONDS
+from database.db import run_db
+from database.lease import acquire_lease, release_lease
+from utils.metrics import counter, gauge
+
+leader_changes = counter("taskbot_leader_changes_total", "Times this replica gained or lost a lease", ("lease", "change"))
+
+def default_replica_id() -> str:
+    # The random suffix keeps a restarted process from mistaking its predecessor's lease for its own
+    return REPLICA_ID or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+class LeaderElection:
+    """
+    Keeps trying to hold a database lease, so exactly one of several replicas does the singleton work.
+    The holder renews the lease every `renew_every` seconds. If it cannot renew, it steps down on its own
+    before the lease expires in the database, so the next holder never overlaps with it.
+    """
+    def __init__(self, name: str, holder: str = None, ttl: float = LEASE_TTL_SECONDS, renew_every: float = LEASE_RENEW_SECONDS):
+        if renew_every >= ttl:
+            raise ValueError("The lease must be renewed more often than it expires")
+        self.name = name
+        self.holder = holder or default_replica_id()
+        self.ttl = ttl
+        self.renew_every = renew_every
+        self.valid_until = 0.0          # time.monotonic() at which our lease may have expired
+        self._elected = asyncio.Event()
+        self._deposed = asyncio.Event()
+        self._deposed.set()
+        self._task = None
+        gauge(f"taskbot_leader_{name}", f"1 while this replica holds the {name} lease", fn=lambda: int(self.is_leader))
+
+    @property
+    def is_leader(self) -> bool:
+        return self._elected.is_set()
+
+    async def wait_until_leader(self):
+        await self._elected.wait()
+
+    async def wait_until_deposed(self):
+        await self._deposed.wait()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run(), name=f"lease-{self.name}")
+
+    async def stop(self):
+        """Stops campaigning and releases the lease so another replica can take over right away."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.is_leader:
+            self._step_down()
+            try:
+                await run_db(release_lease, self.name, self.holder)
+            except Exception as e:
+                print(f"Could not release the {self.name} lease: {e}")
+
+    async def _run(self):
+        while True:
+            attempted = time.monotonic()
+            try:
+                held = await asyncio.wait_for(
+                    run_db(acquire_lease, self.name, self.holder, timedelta(seconds=self.ttl)), timeout=self.renew_every
+                )
+            except Exception as e:
+                # Keep leading while the lease we already have is still valid; the next attempt may succeed
+                print(f"Could not renew the {self.name} lease: {e!r}")
+                held = None
+            if held:
+                # Counted from before the query, so our view of the lease expires no later than the database's
+                self.valid_until = attempted + self.ttl
+                if not self.is_leader:
+                    self._elected.set()
+                    self._deposed.clear()
+                    leader_changes.inc(lease=self.name, change="elected")
+                    print(f"Replica {self.holder} is now the {self.name} leader")
+            elif self.is_leader and (held is False or time.monotonic() >= self.valid_until):
+                self._step_down()
+
+            # Wake up early if the lease would lapse before the next renewal
+            delay = self.renew_every
+            if self.is_leader:
+                delay = min(delay, max(self.valid_until - time.monotonic(), 0))
+            await asyncio.sleep(delay)
+
+    def _step_down(self):
+        self._elected.clear()
+        self._deposed.set()
+        leader_changes.inc(lease=self.name, change="deposed")
+        print(f"Replica {self.holder} is no longer the {self.name} leader")
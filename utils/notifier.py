@@ -0,0 +1,171 @@
+# utils/notifier.py
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+import aiohttp
+import discord
+
+# Per-channel pacing: Discord allows roughly 5 messages per 5 seconds in a channel
+CHANNEL_RATE = 1.0      # tokens added per second
+CHANNEL_BURST = 5       # bucket capacity
+# Retry policy for transient failures (5xx, connection errors)
+MAX_ATTEMPTS = 5
+BASE_BACKOFF = 1.0      # seconds, doubled after every failed attempt
+# Embed limits used when merging notifications into one digest
+DIGEST_MAX_FIELDS = 25
+DIGEST_MAX_CHARS = 5500
+# Channel workers exit after being idle this long and are restarted on demand
+IDLE_TIMEOUT = 60
+
+@dataclass
+class Notification:
+    embed: discord.Embed
+    mention: str = ""
+    summary: Optional[str] = None  # One-line text shown when merged into a digest; defaults to the embed description
+    future: asyncio.Future = field(default=None, repr=False)
+
+class TokenBucket:
+    def __init__(self, rate: float = CHANNEL_RATE, capacity: int = CHANNEL_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        """Waits until a token is available and takes it."""
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+def build_digest(batch: list) -> discord.Embed:
+    """Merges several notifications into one embed with a field per notification."""
+    digest = discord.Embed(
+        title="🔔 Task Notifications",
+        description=f"{len(batch)} updates for this portfolio:",
+        color=batch[0].embed.color
+    )
+    for notification in batch:
+        name = (notification.embed.title or "Notification")[:256]
+        value = (notification.summary or notification.embed.description or "-")[:1024]
+        digest.add_field(name=name, value=value, inline=False)
+    return digest
+
+class NotificationDispatcher:
+    """
+    Background delivery of channel notifications.
+    Every channel has its own queue and worker, paced by a token bucket. Notifications that pile up
+    while a worker waits for a token are sent together as one digest message.
+    """
+    def __init__(self):
+        self._queues = {}   # channel_id -> deque of Notification
+        self._wakeups = {}  # channel_id -> asyncio.Event
+        self._buckets = {}  # channel_id -> TokenBucket
+        self._workers = {}  # channel_id -> asyncio.Task
+        self._channels = {} # channel_id -> channel
+        self._closed = False
+
+    def queue_depth(self) -> int:
+        """Number of notifications waiting to be sent over all channels."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    def enqueue(self, channel: discord.abc.Messageable, embed: discord.Embed, mention: str = "", summary: str = None) -> asyncio.Future:
+        """
+        Queues a notification for the channel and returns immediately.
+        The returned future resolves to True once delivered, or False if it was dropped.
+        """
+        future = asyncio.get_running_loop().create_future()
+        if self._closed:
+            future.set_result(False)
+            return future
+        channel_id = channel.id
+        self._channels[channel_id] = channel
+        self._queues.setdefault(channel_id, deque()).append(Notification(embed, mention, summary, future))
+        self._wakeups.setdefault(channel_id, asyncio.Event()).set()
+        worker = self._workers.get(channel_id)
+        if worker is None or worker.done():
+            self._workers[channel_id] = asyncio.create_task(self._worker(channel_id))
+        return future
+
+    async def _worker(self, channel_id: int):
+        queue = self._queues[channel_id]
+        wakeup = self._wakeups[channel_id]
+        bucket = self._buckets.setdefault(channel_id, TokenBucket())
+        while True:
+            if not queue:
+                wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    if not queue:
+                        self._workers.pop(channel_id, None)
+                        return
+            await bucket.acquire()
+            batch = self._take_batch(queue)
+            delivered = False
+            try:
+                delivered = await self._send(self._channels[channel_id], batch)
+            except Exception as e:
+                # Keep the worker alive; the batch counts as dropped
+                print(f"Error sending notification for channel {channel_id}: {e}")
+            finally:
+                # Also resolved when the worker is cancelled mid-send, so nobody awaits them forever
+                for notification in batch:
+                    if not notification.future.done():
+                        notification.future.set_result(delivered)
+
+    def _take_batch(self, queue: deque) -> list:
+        """Takes everything that fits in one message off the queue."""
+        batch = [queue.popleft()]
+        size = len(batch[0].summary or batch[0].embed.description or "")
+        while queue and len(batch) < DIGEST_MAX_FIELDS:
+            notification = queue[0]
+            size += len(notification.summary or notification.embed.description or "") + len(notification.embed.title or "")
+            if size > DIGEST_MAX_CHARS:
+                break
+            batch.append(queue.popleft())
+        return batch
+
+    async def _send(self, channel, batch: list) -> bool:
+        if len(batch) == 1:
+            content, embed = batch[0].mention, batch[0].embed
+        else:
+            mentions = dict.fromkeys(n.mention for n in batch if n.mention)
+            content, embed = " ".join(mentions), build_digest(batch)
+
+        delay = BASE_BACKOFF
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                await channel.send(content=content, embed=embed)
+                return True
+            except (discord.Forbidden, discord.NotFound) as e:
+                # Retrying cannot help
+                print(f"Dropping notification for channel {channel.id}: {e}")
+                return False
+            except (discord.HTTPException, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == MAX_ATTEMPTS:
+                    print(f"Giving up on notification for channel {channel.id} after {attempt} attempts: {e}")
+                    return False
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    async def close(self, timeout: float = 10):
+        """Stops accepting notifications and gives the queued ones a short time to drain."""
+        self._closed = True
+        workers = [worker for worker in self._workers.values() if not worker.done()]
+        pending = [n.future for queue in self._queues.values() for n in queue]
+        if pending:
+            await asyncio.wait(pending, timeout=timeout)
+        for worker in workers:
+            worker.cancel()
+        for queue in self._queues.values():
+            for notification in queue:
+                if not notification.future.done():
+                    notification.future.set_result(False)
+            queue.clear()
@@ -0,0 +1,110 @@
+# utils/portfolio_cache.py
+import time
+from typing import NamedTuple, Optional
+import discord
+from database.db import run_db
+from database import crud
+
+# Guild events after which cached channel and role objects may be outdated
+INVALIDATING_EVENTS = (
+    "on_ready",
+    "on_guild_available",
+    "on_guild_remove",
+    "on_guild_role_create",
+    "on_guild_role_update",
+    "on_guild_role_delete",
+    "on_guild_channel_create",
+    "on_guild_channel_update",
+    "on_guild_channel_delete",
+)
+
+# Minimum time between database reloads triggered by unknown portfolio ids
+MISS_REFRESH_INTERVAL = 30
+
+class ResolvedPortfolio(NamedTuple):
+    portfolio_id: int
+    name: str
+    channel: Optional[discord.abc.GuildChannel]
+    role: Optional[discord.Role]
+
+    @property
+    def role_mention(self) -> str:
+        return self.role.mention if self.role else ""
+
+def role_name_for(portfolio_name: str) -> str:
+    """Name of the guild role that is mentioned for a portfolio, e.g. "IT Portfolio"."""
+    return f"{portfolio_name} Portfolio"
+
+class PortfolioCache:
+    """
+    Process-wide cache mapping portfolio_id to its name, notification channel and role.
+    Portfolio rows are loaded from the database once and reloaded by refresh();
+    channel and role objects are resolved on first use and dropped whenever the guild changes.
+    """
+    def __init__(self, bot: discord.Client):
+        self.bot = bot
+        self._portfolios = {}  # portfolio_id -> (name, channel_id)
+        self._resolved = {}    # portfolio_id -> ResolvedPortfolio
+        self._last_refresh = 0.0
+        self.generation = 0    # Incremented by every refresh, so renders that include portfolio names can be cached
+
+    def attach(self):
+        """Registers the guild listeners that invalidate resolved channels and roles."""
+        for event in INVALIDATING_EVENTS:
+            self.bot.add_listener(self._on_guild_change, event)
+
+    async def _on_guild_change(self, *args):
+        self.invalidate()
+
+    def invalidate(self):
+        self._resolved.clear()
+
+    async def refresh(self):
+        """Reloads all portfolios from the database."""
+        portfolios = await run_db(crud.get_portfolios)
+        entries = {}
+        for p in portfolios:
+            try:
+                channel_id = int(p.channel_id)
+            except (TypeError, ValueError):
+                channel_id = None
+            entries[p.portfolio_id] = (p.name, channel_id)
+        self._portfolios = entries
+        self._resolved.clear()
+        self._last_refresh = time.monotonic()
+        self.generation += 1
+
+    def __contains__(self, portfolio_id: int):
+        return portfolio_id in self._portfolios
+
+    def name(self, portfolio_id: int, default: str = "Unknown") -> str:
+        entry = self._portfolios.get(portfolio_id)
+        return entry[0] if entry else default
+
+    def find(self, name: str) -> Optional[int]:
+        """Returns the id of the portfolio with the given name (case-insensitive), or None."""
+        name = name.strip().lower()
+        return next((pid for pid, (pname, _) in self._portfolios.items() if (pname or "").lower() == name), None)
+
+    def get(self, portfolio_id: int) -> Optional[ResolvedPortfolio]:
+        """Returns the cached portfolio with its channel and role, or None if the portfolio is unknown."""
+        resolved = self._resolved.get(portfolio_id)
+        if resolved is not None:
+            return resolved
+        entry = self._portfolios.get(portfolio_id)
+        if entry is None:
+            return None
+        name, channel_id = entry
+        channel = self.bot.get_channel(channel_id) if channel_id else None
+        role = discord.utils.get(channel.guild.roles, name=role_name_for(name)) if channel else None
+        resolved = ResolvedPortfolio(portfolio_id, name, channel, role)
+        # Only keep complete results; the channel may simply not be cached yet before the bot is ready
+        if channel is not None:
+            self._resolved[portfolio_id] = resolved
+        return resolved
+
+    async def resolve(self, portfolio_id: int) -> Optional[ResolvedPortfolio]:
+        """Like get(), but reloads the portfolios once if the id is unknown (e.g. a portfolio was just added)."""
+        if portfolio_id not in self._portfolios and time.monotonic() - self._last_refresh > MISS_REFRESH_INTERVAL:
+            await self.refresh()
+        return self.get(portfolio_id)
@@ -0,0 +1,302 @@
+# utils/postprocess.py
+import asyncio
+import importlib
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import subprocess
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from config import RECORDINGS_SPOOL_DIR, RECORDINGS_BUCKET, PROCESSING_WORKERS, TRANSCRIBER, MEETINGS_ROW_KEY
+from utils.upload_worker import write_json_atomic
+from utils.metrics import histogram
+
+# Silences longer than this many seconds (quieter than SILENCE_THRESHOLD_DB) are cut out
+SILENCE_SECONDS = 2
+SILENCE_THRESHOLD_DB = -50
+# Trimming and EBU R128 loudness normalization, applied in the same ffmpeg pass that joins and transcodes
+AUDIO_FILTERS = (
+    f"silenceremove=start_periods=1:start_threshold={SILENCE_THRESHOLD_DB}dB:"
+    f"stop_periods=-1:stop_duration={SILENCE_SECONDS}:stop_threshold={SILENCE_THRESHOLD_DB}dB,"
+    "loudnorm=I=-16:TP=-1.5:LRA=11"
+)
+# The processed meeting is a single mono speech-tuned Opus file
+OUTPUT_EXTENSION = ".ogg"
+OUTPUT_CONTENT_TYPE = "audio/ogg"
+OUTPUT_ARGS = ["-ac", "1", "-c:a", "libopus", "-b:a", "32k", "-application", "voip", "-f", "ogg"]
+# Failed jobs are retried after RETRY_DELAY * attempt seconds; after MAX_ATTEMPTS the unprocessed recording is recorded instead
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 30
+
+_child = None  # The ffmpeg process a worker is waiting on, so it can be stopped together with the worker
+
+def _init_worker():
+    """Runs in every worker process: on SIGTERM (see PostProcessor.stop), stop ffmpeg before exiting."""
+    signal.signal(signal.SIGTERM, _terminate_worker)
+
+def _terminate_worker(signum, frame):
+    if _child is not None and _child.poll() is None:
+        _child.kill()
+        _child.wait()
+    os._exit(1)
+
+stage_seconds = histogram("taskbot_postprocess_stage_seconds", "Time taken by each recording post-processing stage", ("stage",))
+
+def process_audio(part_paths: list, output_path: str):
+    """
+    Joins the recorded parts, trims long silences, normalizes loudness and encodes the result, in one ffmpeg pass.
+    Runs in a worker process; ffmpeg is limited to one thread so parallel jobs do not oversubscribe the CPU.
+    """
+    list_path = f"{output_path}.parts.txt"
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in part_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    global _child
+    try:
+        _child = subprocess.Popen(
+            ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-threads", "1",
+             "-f", "concat", "-safe", "0", "-i", list_path,
+             "-af", AUDIO_FILTERS, *OUTPUT_ARGS, output_path],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        )
+        _, stderr = _child.communicate()
+        returncode = _child.returncode
+    finally:
+        _child = None
+        os.remove(list_path)
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed ({returncode}): {stderr.decode(errors='replace')[-500:]}")
+
+def transcribe(transcriber: str, audio_path: str) -> str:
+    """Runs the configured "module:function" transcriber on a file. Runs in a worker process."""
+    module_name, _, function_name = transcriber.partition(":")
+    function = getattr(importlib.import_module(module_name), function_name or "transcribe")
+    return function(audio_path) or ""
+
+class PostProcessor:
+    """
+    Post-processes finished recordings in a pool of worker processes, so the CPU-heavy work never
+    competes with the event loop or the voice threads. At most `workers` jobs run at once.
+    Each job is a directory in the spool holding links to the recorded parts and a job.json with its
+    stage ("audio", "transcribe", "upload", "submitted"); jobs left unfinished by a restart resume from
+    their stage. Job directories whose job.json cannot be read are renamed to .bad and left for inspection.
+    Progress is reported by editing one message in the channel the recording was stopped from.
+    The Meetings Records row is only inserted once the job is done, so it can include the transcript.
+    """
+    def __init__(self, bot, uploads, spool_dir: str = RECORDINGS_SPOOL_DIR, workers: int = PROCESSING_WORKERS,
+                 transcriber: str = TRANSCRIBER):
+        self.bot = bot
+        self.uploads = uploads
+        self.jobs_dir = os.path.join(spool_dir, "processing")
+        self.workers = workers
+        self.transcriber = transcriber
+        self.pool = None
+        self.queue = asyncio.Queue()
+        self._tasks = []
+        self._retry_handles = set()
+
+    async def start(self):
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        for name in sorted(os.listdir(self.jobs_dir)):
+            job_dir = os.path.join(self.jobs_dir, name)
+            if name.endswith(".bad"):
+                continue
+            if os.path.exists(os.path.join(job_dir, "job.json")):
+                self.queue.put_nowait(job_dir)
+            else:
+                # A recording that was still running when the bot stopped; its parts were uploaded as they closed
+                shutil.rmtree(job_dir, ignore_errors=True)
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for handle in self._retry_handles:
+            handle.cancel()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.pool is not None:
+            # Interrupted jobs keep their stage and are redone on the next start. The workers are terminated
+            # rather than awaited; each one stops its ffmpeg on the way out (see _init_worker)
+            pool, self.pool = self.pool, None
+            processes = list((pool._processes or {}).values())
+            pool.shutdown(wait=False, cancel_futures=True)
+            for process in processes:
+                process.terminate()
+            await asyncio.get_running_loop().run_in_executor(None, _join_all, processes)
+
+    def pending(self) -> int:
+        return self.queue.qsize() + len(self._retry_handles)
+
+    def new_job(self) -> str:
+        """Creates the directory that collects a recording's parts while it is being recorded."""
+        job_dir = os.path.join(self.jobs_dir, uuid.uuid4().hex)
+        os.makedirs(job_dir)
+        return job_dir
+
+    def keep(self, job_dir: str, file_path: str, name: str):
+        """Keeps a closed part for processing. A hard link costs no copy and survives the upload deleting the original."""
+        target = os.path.join(job_dir, name)
+        try:
+            os.link(file_path, target)
+        except OSError:
+            shutil.copyfile(file_path, target)
+
+    def submit(self, job_dir: str, parts: list, folder: str, meeting_name: str, row: dict,
+               playlist: str, channel_id: int = None):
+        """Persists and queues the job for a finished recording whose parts were collected with keep()."""
+        write_json_atomic(os.path.join(job_dir, "job.json"), {
+            "parts": parts,
+            "folder": folder,
+            "meeting_name": meeting_name,
+            "row": row,
+            "playlist": playlist,
+            "channel_id": channel_id,
+            "stage": "audio",
+            "transcript": "",
+            "attempts": 0,
+            "message_id": None,
+        })
+        self.queue.put_nowait(job_dir)
+
+    async def _run(self):
+        while True:
+            job_dir = await self.queue.get()
+            try:
+                await self._process(job_dir)
+            except Exception as e:
+                # Keep the worker alive for the other jobs; this one is picked up again on the next start
+                print(f"Error post-processing {job_dir}: {e!r}")
+            finally:
+                self.queue.task_done()
+
+    async def _in_pool(self, stage: str, fn, *args):
+        if self.pool is None:
+            # Created on the first job; spawned workers do not inherit the bot's threads and connections
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=_init_worker)
+        pool = self.pool
+        started = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            # A worker died (out of memory, a crashing transcriber) and took the pool with it; the job is
+            # retried like any failure, and the next job starts a fresh pool
+            if self.pool is pool:
+                self.pool = None
+                pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        stage_seconds.observe(time.perf_counter() - started, stage=stage)
+        return result
+
+    async def _process(self, job_dir: str):
+        job_path = os.path.join(job_dir, "job.json")
+        try:
+            with open(job_path, encoding="utf-8") as f:
+                job = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Setting aside post-processing job {job_dir}: unreadable job file: {e}")
+            os.replace(job_dir, f"{job_dir}.bad")
+            return
+        if job["stage"] == "submitted":
+            # Handed to the upload worker before a restart; only the cleanup is left
+            shutil.rmtree(job_dir, ignore_errors=True)
+            return
+        output_path = os.path.join(job_dir, f"processed{OUTPUT_EXTENSION}")
+        steps = 3 if self.transcriber else 2
+        try:
+            if job["stage"] == "audio":
+                await self._progress(job, job_path, f"trimming, normalizing and transcoding (1/{steps})")
+                await self._in_pool("audio", process_audio, [os.path.join(job_dir, part) for part in job["parts"]], output_path)
+                job["stage"] = "transcribe"
+                write_json_atomic(job_path, job)
+            if job["stage"] == "transcribe":
+                if self.transcriber:
+                    await self._progress(job, job_path, f"transcribing (2/{steps})")
+                    job["transcript"] = await self._in_pool("transcribe", transcribe, self.transcriber, output_path)
+                job["stage"] = "upload"
+                write_json_atomic(job_path, job)
+        except Exception as e:
+            job["attempts"] += 1
+            job["last_error"] = str(e)
+            write_json_atomic(job_path, job)
+            if job["attempts"] < MAX_ATTEMPTS:
+                delay = RETRY_DELAY * job["attempts"]
+                print(f"Post-processing of {job['folder']} failed (attempt {job['attempts']}), retrying in {delay}s: {e}")
+                self._retry_later(job_dir, delay)
+                return
+            print(f"Post-processing of {job['folder']} failed for good, keeping the unprocessed recording: {e}")
+            self._submit_row(job, job["row"])
+            job["stage"] = "submitted"
+            write_json_atomic(job_path, job)
+            await self._progress(job, job_path, "failed, the unprocessed recording was kept ❌")
+            shutil.rmtree(job_dir, ignore_errors=True)
+            return
+
+        if job["stage"] == "upload":
+            self._submit_result(job, job_path, output_path)
+        await self._progress(job, job_path, "done, the processed recording is being uploaded ✅")
+        shutil.rmtree(job_dir, ignore_errors=True)
+
+    def _submit_result(self, job: dict, job_path: str, output_path: str):
+        """
+        Hands the processed file to the upload worker, which inserts the row once the file is stored.
+        The upload job is written before the file is moved into the spool, so the spool never holds it without
+        a job (which the upload worker would recover as an orphan). Safe to repeat after a restart.
+        """
+        if not job.get("upload_path"):
+            job["upload_path"] = self.uploads.spool_path(OUTPUT_EXTENSION)
+            write_json_atomic(job_path, job)
+        upload_path = job["upload_path"]
+        if os.path.exists(output_path):
+            # Already submitted if a restart came between submit() and the move
+            if not os.path.exists(self.uploads.job_path(upload_path)):
+                object_path = f"{job['folder']}/processed{OUTPUT_EXTENSION}"
+                self.uploads.submit(
+                    upload_path, RECORDINGS_BUCKET, object_path, OUTPUT_CONTENT_TYPE, table="Meetings Records",
+                    row={**job["row"], "Audio Path": f"{RECORDINGS_BUCKET}/{object_path}", "Auto Caption": job["transcript"]},
+                    channel_id=job["channel_id"], row_key=MEETINGS_ROW_KEY,
+                )
+            os.replace(output_path, upload_path)
+        job["stage"] = "submitted"
+        write_json_atomic(job_path, job)
+
+    def _submit_row(self, job: dict, row: dict):
+        """Records the meeting with the playlist of the unprocessed parts, as when post-processing is disabled."""
+        playlist_path = self.uploads.spool_path(".m3u")
+        with open(playlist_path, "w", encoding="utf-8") as f:
+            f.write(job["playlist"])
+        self.uploads.submit(playlist_path, RECORDINGS_BUCKET, f"{job['folder']}/playlist.m3u", "audio/x-mpegurl",
+                            table="Meetings Records", row=row, channel_id=job["channel_id"],
+                            row_key=MEETINGS_ROW_KEY)
+
+    def _retry_later(self, job_dir: str, delay: float):
+        def requeue():
+            self._retry_handles.discard(handle)
+            self.queue.put_nowait(job_dir)
+        handle = asyncio.get_running_loop().call_later(delay, requeue)
+        self._retry_handles.add(handle)
+
+    async def _progress(self, job: dict, job_path: str, status: str):
+        """Shows the job's status in one channel message, edited as the job moves on."""
+        channel = self.bot.get_channel(job["channel_id"]) if job.get("channel_id") else None
+        if channel is None:
+            return
+        content = f"🎛️ Post-processing **{job['meeting_name']}**: {status}"
+        try:
+            if job.get("message_id"):
+                await channel.get_partial_message(job["message_id"]).edit(content=content)
+            else:
+                message = await channel.send(content)
+                job["message_id"] = message.id
+                write_json_atomic(job_path, job)
+        except Exception as e:
+            print(f"Error sending post-processing progress: {e}")
+
+def _join_all(processes: list, timeout: float = 10):
+    for process in processes:
+        process.join(timeout)
@@ -0,0 +1,311 @@
+# utils/recording.py
+import asyncio
+import os
+import subprocess
+import time
+from array import array
+from collections import deque
+from contextlib import suppress
+from typing import NamedTuple
+from config import RECORDING_FORMAT, RECORDING_SEGMENT_MINUTES, RECORDING_SEGMENT_MB
+
+_voice_recv = None  # The discord.ext.voice_recv module once imported
+
+def load_voice_recv():
+    """
+    Imports discord-ext-voice-recv on first use and returns it.
+    Voice receive is not part of discord.py and is only needed once somebody records, so it is not imported at startup.
+    """
+    global _voice_recv
+    if _voice_recv is None:
+        from discord.ext import voice_recv
+        _voice_recv = voice_recv
+    return _voice_recv
+
+# Discord voice is decoded to 48 kHz stereo signed 16-bit PCM
+PCM_ARGS = ["-f", "s16le", "-ar", "48000", "-ac", "2", "-i", "-"]
+
+# Voice arrives in 20 ms frames: 960 stereo samples of 2 bytes
+FRAME_SECONDS = 0.02
+FRAME_BYTES = 3840
+SILENCE = bytes(FRAME_BYTES)
+# A speaker's frames are played once this many are buffered, to smooth out bursty packet arrival
+JITTER_FRAMES = 3
+# Frames buffered per speaker at most (about 1 s); older frames are dropped beyond that
+MAX_BUFFERED_FRAMES = 50
+# Frames buffered per recording between the mixer and ffmpeg (20 ms each, so about 10 s)
+QUEUE_FRAMES = 500
+# An encoder that dies or cannot be started is replaced at most this many times per recording
+MAX_ENCODER_RESTARTS = 5
+
+# Output format -> (file extension, content type, ffmpeg encoder arguments)
+ENCODERS = {
+    "opus": (".ogg", "audio/ogg", ["-c:a", "libopus", "-b:a", "64k", "-application", "voip", "-f", "ogg"]),
+    "flac": (".flac", "audio/flac", ["-c:a", "flac", "-compression_level", "5", "-f", "flac"]),
+}
+
+def encoder_for(fmt: str = RECORDING_FORMAT):
+    """Returns (extension, content type, ffmpeg arguments) for a recording format, falling back to Opus."""
+    return ENCODERS.get(fmt, ENCODERS["opus"])
+
+async def start_encoder(output_path: str, fmt: str = RECORDING_FORMAT) -> asyncio.subprocess.Process:
+    """
+    Starts an ffmpeg process that reads raw PCM on stdin and encodes it to output_path as it arrives,
+    so only compressed audio ever reaches the disk.
+    """
+    _, _, codec_args = encoder_for(fmt)
+    return await asyncio.create_subprocess_exec(
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        *PCM_ARGS,
+        *codec_args,
+        output_path,
+        stdin=subprocess.PIPE,
+        stderr=subprocess.DEVNULL
+    )
+
+def mix_frames(frames: list) -> bytes:
+    """Sums 16-bit PCM frames sample by sample, clipping to the 16-bit range."""
+    if len(frames) == 1:
+        return frames[0]
+    totals = list(map(sum, zip(*(array("h", frame) for frame in frames))))
+    # Clipping is rare and costs a pass over the samples, so only do it when something overflows
+    if max(totals) > 32767 or min(totals) < -32768:
+        totals = [32767 if total > 32767 else -32768 if total < -32768 else total for total in totals]
+    return array("h", totals).tobytes()
+
+class VoiceMixer:
+    """
+    Mixes every speaker into one PCM stream on a fixed 20 ms clock.
+    Frames are buffered per user; each tick takes one frame from every speaking user and sums them, and a tick
+    with nobody speaking yields silence, so the stream keeps real time however many people talk.
+    """
+    def __init__(self, output):
+        self.output = output   # called on the event loop with every mixed frame
+        self.loop = asyncio.get_running_loop()
+        self.buffers = {}      # user id -> deque of frames
+        self.playing = set()   # users whose buffer is being played
+        self.frames_dropped = 0
+        self._task = None
+
+    def start(self):
+        self._task = self.loop.create_task(self._run())
+
+    def feed_threadsafe(self, user_id, pcm: bytes):
+        """Buffers a user's frame from any thread without blocking it."""
+        self.loop.call_soon_threadsafe(self._feed, user_id, pcm)
+
+    def _feed(self, user_id, pcm: bytes):
+        buffer = self.buffers.get(user_id)
+        if buffer is None:
+            buffer = self.buffers[user_id] = deque()
+        if len(buffer) >= MAX_BUFFERED_FRAMES:
+            buffer.popleft()
+            self.frames_dropped += 1
+        # Frames are normally exactly 20 ms; pad or cut the odd one so the samples line up
+        buffer.append(pcm if len(pcm) == FRAME_BYTES else pcm[:FRAME_BYTES].ljust(FRAME_BYTES, b"\0"))
+
+    def _tick(self) -> bytes:
+        frames = []
+        for user_id, buffer in self.buffers.items():
+            if user_id not in self.playing:
+                if len(buffer) < JITTER_FRAMES:
+                    continue
+                self.playing.add(user_id)
+            frames.append(buffer.popleft())
+            if not buffer:
+                self.playing.discard(user_id)
+        return mix_frames(frames) if frames else SILENCE
+
+    async def _run(self):
+        # Ticks are scheduled against the start time, so a late wakeup does not shift the timeline
+        next_tick = self.loop.time()
+        while True:
+            self.output(self._tick())
+            next_tick += FRAME_SECONDS
+            await asyncio.sleep(max(0.0, next_tick - self.loop.time()))
+
+    async def close(self):
+        """Stops the clock and mixes out whatever is still buffered."""
+        # Let frames already handed over by the voice thread reach the buffers
+        await asyncio.sleep(0)
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self.playing.update(user_id for user_id, buffer in self.buffers.items() if buffer)
+        while self.playing:
+            self.output(self._tick())
+
+class Segment(NamedTuple):
+    index: int
+    path: str
+    duration: float  # seconds of wall-clock time covered by the segment
+    size: int        # bytes on disk
+
+class SegmentedRecorder:
+    """
+    Records one meeting as a series of encoded files.
+    Voice frames are mixed by a VoiceMixer, and the mixed frames move from a bounded queue into the
+    current encoder's stdin; every write awaits drain(), so a slow encoder fills the queue instead of
+    growing an unbounded pipe buffer, and frames that arrive while the queue is full are dropped and
+    counted. The encoder is restarted on a new file every `segment_seconds` or once the file reaches
+    `segment_bytes`, and each closed segment is passed to `on_segment` while recording continues.
+    An encoder that exits early is replaced too, up to MAX_ENCODER_RESTARTS times.
+    """
+    def __init__(self, path_factory, on_segment, fmt: str = RECORDING_FORMAT,
+                 segment_seconds: float = RECORDING_SEGMENT_MINUTES * 60,
+                 segment_bytes: int = RECORDING_SEGMENT_MB * 1024 * 1024,
+                 maxsize: int = QUEUE_FRAMES):
+        self.path_factory = path_factory  # extension -> new file path
+        self.on_segment = on_segment      # called with each closed Segment
+        self.fmt = fmt
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = segment_bytes
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.segments = []
+        self.mixer = VoiceMixer(self._put)
+        self.frames_written = 0
+        self.queue_dropped = 0
+        self.encoder_failures = 0
+        self.process = None
+        self.path = None
+        self._started_at = 0.0
+        self._frames_in_segment = 0
+        self._task = None
+
+    @property
+    def queue_depth(self) -> int:
+        return self.queue.qsize()
+
+    @property
+    def frames_dropped(self) -> int:
+        return self.queue_dropped + self.mixer.frames_dropped
+
+    async def start(self):
+        await self._open_segment()
+        self._task = self.loop.create_task(self._run())
+        self.mixer.start()
+
+    def feed_threadsafe(self, user_id, pcm: bytes):
+        """Hands a user's decoded frame to the mixer from any thread without blocking it."""
+        self.mixer.feed_threadsafe(user_id, pcm)
+
+    def _put(self, pcm: bytes):
+        try:
+            self.queue.put_nowait(pcm)
+        except asyncio.QueueFull:
+            self.queue_dropped += 1
+
+    async def _open_segment(self):
+        extension, _, _ = encoder_for(self.fmt)
+        self.path = self.path_factory(extension)
+        self.process = await start_encoder(self.path, self.fmt)
+        self._started_at = time.monotonic()
+        self._frames_in_segment = 0
+
+    async def _close_segment(self):
+        """Finishes the current encoder and passes its file on, unless the encoder died before writing anything."""
+        process, self.process = self.process, None
+        if process is None:
+            return
+        process.stdin.close()
+        await process.wait()
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if not size:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        segment = Segment(len(self.segments), self.path, time.monotonic() - self._started_at, size)
+        self.segments.append(segment)
+        self.on_segment(segment)
+
+    async def _open_encoder(self) -> bool:
+        """Starts the encoder for a new segment, retrying if it fails. Returns False once the restarts are used up."""
+        while self.encoder_failures <= MAX_ENCODER_RESTARTS:
+            try:
+                await self._open_segment()
+                return True
+            except OSError as e:
+                self.encoder_failures += 1
+                print(f"Could not start the recording encoder ({self.encoder_failures}/{MAX_ENCODER_RESTARTS + 1}): {e}")
+        return False
+
+    def _segment_full(self) -> bool:
+        if time.monotonic() - self._started_at >= self.segment_seconds:
+            return True
+        # Checking the file size costs a syscall, so only do it every few hundred frames
+        return self._frames_in_segment % 250 == 0 and os.path.getsize(self.path) >= self.segment_bytes
+
+    async def _run(self):
+        while True:
+            pcm = await self.queue.get()
+            if pcm is None:
+                break
+            if self.process is not None and self._frames_in_segment and self._segment_full():
+                await self._close_segment()
+            if self.process is None and not await self._open_encoder():
+                # No encoder can be started; keep consuming so producers never block
+                self.queue_dropped += 1
+                continue
+            try:
+                self.process.stdin.write(pcm)
+                await self.process.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                # The encoder exited: keep what it wrote and start a new one for the next frame
+                self.queue_dropped += 1
+                self.encoder_failures += 1
+                print(f"Recording encoder exited early ({self.encoder_failures}/{MAX_ENCODER_RESTARTS + 1}), starting a new segment")
+                await self._close_segment()
+                continue
+            self.frames_written += 1
+            self._frames_in_segment += 1
+
+    async def close(self) -> list:
+        """Flushes the buffered and queued frames, finishes the last segment and returns all segments in order."""
+        await self.mixer.close()
+        if not self._task.done():
+            await self.queue.put(None)
+        try:
+            await self._task
+        except Exception as e:
+            # Keep the segments that were finished before the failure
+            print(f"Recording encoder loop failed: {e!r}")
+        await self._close_segment()
+        return self.segments
+
+def build_playlist(segment_names: list, segments: list) -> str:
+    """Builds an M3U playlist that plays the segments back to back as one meeting."""
+    lines = ["#EXTM3U"]
+    for name, segment in zip(segment_names, segments):
+        lines.append(f"#EXTINF:{segment.duration:.1f},Part {segment.index + 1}")
+        lines.append(name)
+    return "\n".join(lines) + "\n"
+
+_pcm_sink_class = None
+
+def pcm_sink(recorder: SegmentedRecorder):
+    """
+    Returns a voice receive sink that forwards each user's decoded PCM from the voice thread to the recorder.
+    The sink class derives from voice_recv.AudioSink, so it is only created once voice_recv has been loaded.
+    """
+    global _pcm_sink_class
+    if _pcm_sink_class is None:
+        voice_recv = load_voice_recv()
+
+        class PCMSink(voice_recv.AudioSink):
+            def __init__(self, recorder: SegmentedRecorder):
+                super().__init__()
+                self.recorder = recorder
+
+            def wants_opus(self) -> bool:
+                return False
+
+            def write(self, user, data):
+                if data.pcm:
+                    self.recorder.feed_threadsafe(user.id if user is not None else None, data.pcm)
+
+            def cleanup(self):
+                pass
+
+        _pcm_sink_class = PCMSink
+    return _pcm_sink_class(recorder)
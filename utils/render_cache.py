@@ -0,0 +1,74 @@
+# utils/render_cache.py
+from collections import OrderedDict
+from utils.metrics import counter, gauge
+
+render_cache_requests = counter("taskbot_render_cache_requests_total", "Render cache lookups", ("cache", "result"))
+
+def estimate_size(value) -> int:
+    """Rough memory footprint of a payload made of dicts, lists, tuples, strings and numbers, in bytes."""
+    if isinstance(value, str):
+        return 50 + len(value)
+    if isinstance(value, dict):
+        return 64 + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return 56 + sum(estimate_size(item) for item in value)
+    return 32
+
+class RenderCache:
+    """
+    LRU cache of rendered payloads with a memory budget. Keys must include the version of the data the
+    payload was rendered from, so entries never need invalidating: outdated ones stop being asked for
+    and are evicted as the budget requires.
+    """
+    def __init__(self, name: str, max_bytes: int):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()  # key -> (value, size), least recently used first
+        gauge(f"taskbot_{name}_cache_bytes", f"Estimated size of the {name} render cache", fn=lambda: self.bytes)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            render_cache_requests.inc(cache=self.name, result="miss")
+            return None
+        self._entries.move_to_end(key)
+        render_cache_requests.inc(cache=self.name, result="hit")
+        return entry[0]
+
+    def put(self, key, value, size: int = None):
+        """Stores value, evicting the least recently used entries to stay within the budget."""
+        size = estimate_size(value) if size is None else size
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        self._entries[key] = (value, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+class DataVersions:
+    """
+    Change counters per portfolio. The version of the all-departments view (portfolio None)
+    changes whenever any portfolio does.
+    """
+    def __init__(self):
+        self._versions = {}
+
+    def get(self, portfolio_id) -> int:
+        return self._versions.get(portfolio_id or None, 0)
+
+    def bump(self, portfolio_id):
+        if portfolio_id:
+            self._versions[portfolio_id] = self._versions.get(portfolio_id, 0) + 1
+        self._versions[None] = self._versions.get(None, 0) + 1
@@ -0,0 +1,71 @@
+# utils/scheduler.py
+import heapq
+from datetime import datetime, time, timedelta
+
+# Reminders are sent at 9:00 AM on the day before a task's deadline
+REMINDER_TIME = time(hour=9, minute=0)
+
+def reminder_fire_time(deadline: datetime) -> datetime:
+    """
+    Returns the time at which the reminder for a task with the given deadline should be sent.
+    """
+    return datetime.combine(deadline.date() - timedelta(days=1), REMINDER_TIME)
+
+class ReminderSchedule:
+    """
+    Min-heap of upcoming reminder fire times, one entry per task.
+    Rescheduling a task pushes a new heap entry; the outdated one is discarded lazily when it reaches the top.
+    """
+    def __init__(self):
+        self._heap = []      # (fire_at, task_id)
+        self._fire_at = {}   # task_id -> currently scheduled fire time
+
+    def __len__(self):
+        return len(self._fire_at)
+
+    def __contains__(self, task_id: int):
+        return task_id in self._fire_at
+
+    def schedule(self, task_id: int, fire_at: datetime) -> bool:
+        """
+        Schedules (or reschedules) the reminder for a task.
+        Returns True if this entry is now the earliest one, i.e. the scheduler needs to wake up sooner.
+        """
+        if self._fire_at.get(task_id) == fire_at:
+            return False
+        self._fire_at[task_id] = fire_at
+        heapq.heappush(self._heap, (fire_at, task_id))
+        self._compact()
+        return self.next_fire_time() == fire_at
+
+    def unschedule(self, task_id: int):
+        self._fire_at.pop(task_id, None)
+
+    def due_count(self, now: datetime) -> int:
+        """Number of reminders whose fire time has passed but that have not been popped yet."""
+        return sum(1 for fire_at in self._fire_at.values() if fire_at <= now)
+
+    def next_fire_time(self):
+        """Returns the earliest scheduled fire time, or None if nothing is scheduled."""
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> list:
+        """Removes and returns the ids of all tasks whose reminder is due at `now`."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, task_id = heapq.heappop(self._heap)
+            if self._fire_at.get(task_id) == fire_at:
+                del self._fire_at[task_id]
+                due.append(task_id)
+        return due
+
+    def _discard_stale(self):
+        while self._heap and self._fire_at.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def _compact(self):
+        # Rebuild the heap once outdated entries outnumber live ones
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._fire_at):
+            self._heap = [(fire_at, task_id) for task_id, fire_at in self._fire_at.items()]
+            heapq.heapify(self._heap)
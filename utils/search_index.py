@@ -0,0 +1,136 @@
+# utils/search_index.py
+import bisect
+import heapq
+import math
+import re
+from collections import Counter
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+# Words of the title count this many times more than words of the description
+TITLE_WEIGHT = 2
+# A query word is matched as a prefix of at most this many indexed words
+MAX_EXPANSIONS = 50
+
+_WORD = re.compile(r"\w+")
+
+def tokenize(text: str) -> list:
+    return _WORD.findall(text.lower()) if text else []
+
+class IndexedTask(NamedTuple):
+    words: dict  # word -> weight (title occurrences count TITLE_WEIGHT times)
+    portfolio_id: Optional[int]
+    status: str
+    deadline: Optional[datetime]
+
+class TaskSearchIndex:
+    """
+    In-process inverted index over task titles and descriptions, for databases without full-text search.
+    Every word maps to the tasks containing it; query words match as prefixes, so partial words work too.
+    Results are ranked with a saturated, idf-weighted term frequency (in the spirit of BM25).
+    Not thread-safe: load it in one thread, then only use it from the event loop.
+    """
+    def __init__(self):
+        self._postings = {}   # word -> {task_id: weight}
+        self._words = []      # sorted vocabulary, for prefix lookups
+        self._tasks = {}      # task_id -> IndexedTask
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def load(self, rows):
+        """Adds (task_id, title, description, portfolio_id, status, deadline) rows, e.g. from database.search.iter_search_rows."""
+        for task_id, title, description, portfolio_id, status, deadline in rows:
+            self._add(task_id, title, description, portfolio_id, status, deadline, keep_sorted=False)
+        self._words = sorted(self._postings)
+
+    def update(self, task):
+        """Indexes a created task or re-indexes an edited one."""
+        self.remove(task.task_id)
+        self._add(task.task_id, task.title, task.description, task.portfolio_id, task.status, task.deadline)
+
+    def remove(self, task_id: int):
+        entry = self._tasks.pop(task_id, None)
+        if entry is None:
+            return
+        for word in entry.words:
+            postings = self._postings[word]
+            del postings[task_id]
+            if not postings:
+                del self._postings[word]
+                del self._words[bisect.bisect_left(self._words, word)]
+
+    def _add(self, task_id, title, description, portfolio_id, status, deadline, keep_sorted: bool = True):
+        words = Counter()
+        for word in tokenize(title):
+            words[word] += TITLE_WEIGHT
+        for word in tokenize(description):
+            words[word] += 1
+        self._tasks[task_id] = IndexedTask(dict(words), portfolio_id, status, deadline)
+        for word, weight in words.items():
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = {}
+                if keep_sorted:
+                    bisect.insort(self._words, word)
+            postings[task_id] = weight
+
+    def _expand(self, term: str) -> list:
+        """Indexed words starting with term."""
+        start = bisect.bisect_left(self._words, term)
+        matches = []
+        for word in self._words[start:start + MAX_EXPANSIONS]:
+            if not word.startswith(term):
+                break
+            matches.append(word)
+        return matches
+
+    def _term_scores(self, words: list, candidates) -> dict:
+        """Scores of the tasks containing any of the words (the best one counts), limited to candidates if given."""
+        total = len(self._tasks)
+        result = {}
+        for word in words:
+            postings = self._postings[word]
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            task_ids = postings.keys() if candidates is None else postings.keys() & candidates
+            # Term frequency saturates: a word repeated many times only counts a little more
+            scores = {task_id: idf * postings[task_id] / (postings[task_id] + 1.2) for task_id in task_ids}
+            if not result:
+                result = scores
+            else:
+                for task_id, score in scores.items():
+                    if score > result.get(task_id, 0.0):
+                        result[task_id] = score
+        return result
+
+    def search(self, query: str, portfolio_id: int = None, status: str = None,
+               due_after: datetime = None, due_before: datetime = None, limit: int = 10) -> list:
+        """Returns the ids of up to `limit` tasks containing every query word, best match first."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        # Start with the rarest term so the candidate set shrinks as fast as possible
+        expanded = sorted((self._expand(term) for term in terms), key=lambda words: sum(len(self._postings[w]) for w in words))
+        scores = None
+        for words in expanded:
+            term_scores = self._term_scores(words, None if scores is None else scores.keys())
+            if scores is not None:
+                term_scores = {task_id: score + scores[task_id] for task_id, score in term_scores.items()}
+            scores = term_scores
+            if not scores:
+                return []
+
+        tasks = self._tasks
+        if portfolio_id or status or due_after is not None or due_before is not None:
+            def matches(task_id):
+                entry = tasks[task_id]
+                return ((not portfolio_id or entry.portfolio_id == portfolio_id)
+                        and (not status or entry.status == status)
+                        and (due_after is None or (entry.deadline is not None and entry.deadline >= due_after))
+                        and (due_before is None or (entry.deadline is not None and entry.deadline < due_before)))
+            candidates = filter(matches, scores)
+        else:
+            candidates = scores
+        # Best score first, then the earliest deadline
+        best = heapq.nsmallest(limit, candidates, key=lambda task_id: (-scores[task_id], tasks[task_id].deadline or datetime.max))
+        return best
@@ -0,0 +1,63 @@
+# utils/storage.py
+import asyncio
+from urllib.parse import quote
+import aiohttp
+
+# Size of each chunk read from disk and written to the upload request
+CHUNK_SIZE = 256 * 1024
+
+async def read_chunks(file_path: str, chunk_size: int = CHUNK_SIZE):
+    """Yields the file in chunks, reading off the event loop, so memory use does not depend on file size."""
+    with open(file_path, "rb") as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+class SupabaseClient:
+    """
+    Minimal async client for the Supabase Storage and REST (PostgREST) APIs.
+    One instance shares a single HTTP connection pool; uploads are streamed with chunked transfer encoding.
+    Any server implementing the same endpoints (e.g. a local stand-in) can be used by pointing the URL at it.
+    """
+    def __init__(self, url: str, key: str, session: aiohttp.ClientSession = None):
+        self.url = url.rstrip("/")
+        self.headers = {"Authorization": f"Bearer {key}", "apikey": key}
+        self._session = session
+        self._owns_session = session is None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=None, sock_read=300))
+        return self._session
+
+    def object_url(self, bucket: str, path: str) -> str:
+        return f"{self.url}/storage/v1/object/{quote(bucket)}/{quote(path)}"
+
+    async def upload_file(self, bucket: str, path: str, file_path: str, content_type: str):
+        """Uploads a local file to bucket/path, overwriting any previous object, so retries are idempotent."""
+        headers = {**self.headers, "Content-Type": content_type, "x-upsert": "true"}
+        async with self.session.post(self.object_url(bucket, path), data=read_chunks(file_path), headers=headers) as resp:
+            if resp.status >= 400:
+                raise RuntimeError(f"Storage upload failed ({resp.status}): {await resp.text()}")
+
+    async def insert_row(self, table: str, row: dict, on_conflict: str = None):
+        """
+        Inserts one row into a table through the REST API.
+        With on_conflict (a column with a unique constraint), a row whose key already exists is left alone,
+        so repeating the insert is harmless.
+        """
+        headers = {**self.headers, "Content-Type": "application/json", "Prefer": "return=minimal"}
+        params = None
+        if on_conflict:
+            headers["Prefer"] += ",resolution=ignore-duplicates"
+            params = {"on_conflict": on_conflict}
+        async with self.session.post(f"{self.url}/rest/v1/{quote(table)}", json=row, headers=headers, params=params) as resp:
+            if resp.status >= 400:
+                raise RuntimeError(f"Insert into {table} failed ({resp.status}): {await resp.text()}")
+
+    async def close(self):
+        if self._owns_session and self._session is not None:
+            await self._session.close()
@@ -0,0 +1,78 @@
+# utils/task_export.py
+# Streaming CSV / NDJSON export of tasks for the HTTP server's /export/tasks endpoint.
+import csv
+import io
+import json
+from database.crud import EXPORT_COLUMNS, iter_tasks
+from database.db import SessionLocal
+from utils.date_util import parse_date
+from utils.task_import import STATUSES
+
+# Rows fetched from the cursor and encoded per chunk
+EXPORT_CHUNK_ROWS = 1000
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+FIELDS = [column.key for column in EXPORT_COLUMNS] + ["portfolio"]
+
+def parse_export_filters(params) -> dict:
+    """Reads portfolio_id, status, due_after and due_before from query parameters. Raises ValueError on bad input."""
+    filters = {}
+    if params.get("portfolio_id"):
+        try:
+            filters["portfolio_id"] = int(params["portfolio_id"])
+        except ValueError:
+            raise ValueError("portfolio_id must be a number")
+    if params.get("status"):
+        status = next((s for s in STATUSES if s.lower() == params["status"].lower()), None)
+        if status is None:
+            raise ValueError(f"status must be one of {', '.join(STATUSES)}")
+        filters["status"] = status
+    for name in ("due_after", "due_before"):
+        if params.get(name):
+            moment = parse_date(params[name])
+            if moment is None:
+                raise ValueError(f"{name} must be DD/MM/YYYY, DD/MM/YYYY HH:MM or a relative date such as \"+7d\"")
+            filters[name] = moment
+    return filters
+
+def _value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+class TaskExport:
+    """
+    Blocking, chunked export of matching tasks; each read_chunk() call should run in the database thread pool.
+    The session and its cursor stay open between chunks and are released by close().
+    """
+    def __init__(self, fmt: str, filters: dict, portfolio_name=None):
+        self.fmt = fmt
+        self.portfolio_name = portfolio_name or (lambda portfolio_id: None)
+        self._db = SessionLocal()
+        self._rows = iter_tasks(self._db, batch=EXPORT_CHUNK_ROWS, **filters)
+        self._header = fmt == "csv"
+        self.count = 0
+
+    def read_chunk(self) -> bytes:
+        """Encodes the next EXPORT_CHUNK_ROWS tasks; returns b"" once every task has been read."""
+        buffer = io.StringIO()
+        if self._header:
+            csv.writer(buffer).writerow(FIELDS)
+            self._header = False
+        writer = csv.writer(buffer) if self.fmt == "csv" else None
+        for _ in range(EXPORT_CHUNK_ROWS):
+            row = next(self._rows, None)
+            if row is None:
+                break
+            values = [_value(value) for value in row] + [self.portfolio_name(row.portfolio_id)]
+            if writer is not None:
+                writer.writerow(values)
+            else:
+                buffer.write(json.dumps(dict(zip(FIELDS, values)), ensure_ascii=False))
+                buffer.write("\n")
+            self.count += 1
+        return buffer.getvalue().encode("utf-8")
+
+    def close(self):
+        self._rows.close()
+        self._db.close()
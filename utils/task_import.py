@@ -0,0 +1,134 @@
+# utils/task_import.py
+# Parsing and validation of task files uploaded to /import_tasks.
+import codecs
+import csv
+import json
+from utils.date_util import parse_date
+
+# Largest accepted attachment, in bytes
+MAX_IMPORT_BYTES = 1024 * 1024
+# Most tasks a single import may create
+MAX_IMPORT_ROWS = 1000
+# Validation stops after this many bad rows
+MAX_IMPORT_ERRORS = 10
+
+PRIORITIES = ("Low", "Medium", "High")
+STATUSES = ("Not Started", "In Progress", "Completed", "Cancelled")
+TITLE_LIMIT = 255
+
+def read_records(data: bytes, filename: str):
+    """
+    Yields (line number, record dict) from a CSV, JSON array or JSON lines file, one record at a time.
+    CSV and JSON lines are decoded incrementally; a JSON array is parsed as a whole.
+    """
+    name = filename.lower()
+    if name.endswith(".json"):
+        try:
+            records = json.loads(data.decode("utf-8-sig"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ValueError(f"Invalid JSON: {e}")
+        if not isinstance(records, list):
+            raise ValueError("A JSON file must contain a list of tasks.")
+        for index, record in enumerate(records, start=1):
+            yield index, record
+    elif name.endswith((".jsonl", ".ndjson")):
+        for line_no, line in enumerate(_lines(data), start=1):
+            if line.strip():
+                try:
+                    yield line_no, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_no, ValueError(f"invalid JSON ({e.msg})")
+    elif name.endswith(".csv"):
+        reader = csv.DictReader(_lines(data))
+        for record in reader:
+            # Header is line 1; multi-line cells make the reader's own line counter the accurate one
+            yield reader.line_num, {key.strip().lower(): value for key, value in record.items() if key}
+    else:
+        raise ValueError("Unsupported file type; upload a .csv, .json or .jsonl file.")
+
+def _lines(data: bytes):
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    for start in range(0, len(data), 64 * 1024):
+        pending += decoder.decode(data[start:start + 64 * 1024])
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+def validate_record(record, portfolios, default_portfolio_id: int = None) -> dict:
+    """
+    Checks one imported record and returns the Task column values for it.
+    `portfolios` is the bot's PortfolioCache; portfolios may be given by id or by name.
+    Raises ValueError describing the first problem found.
+    """
+    if isinstance(record, Exception):
+        raise record
+    if not isinstance(record, dict):
+        raise ValueError("expected an object with task fields")
+    record = {str(key).strip().lower(): value for key, value in record.items()}
+
+    title = str(record.get("title") or "").strip()
+    if not title:
+        raise ValueError("title is required")
+    if len(title) > TITLE_LIMIT:
+        raise ValueError(f"title is longer than {TITLE_LIMIT} characters")
+
+    deadline = parse_date(str(record.get("deadline") or "").strip())
+    if deadline is None:
+        raise ValueError("deadline must be DD/MM/YYYY, DD/MM/YYYY HH:MM or a relative date such as +3d")
+
+    portfolio = record.get("portfolio_id", record.get("portfolio"))
+    if portfolio in (None, ""):
+        portfolio_id = default_portfolio_id
+    else:
+        portfolio_id = _portfolio_id(str(portfolio).strip(), portfolios)
+    if portfolio_id is None:
+        raise ValueError(f"unknown portfolio '{portfolio}'" if portfolio not in (None, "") else "portfolio is required")
+
+    priority = str(record.get("priority") or "Low").strip().capitalize()
+    if priority not in PRIORITIES:
+        raise ValueError(f"priority must be one of {', '.join(PRIORITIES)}")
+
+    status = str(record.get("status") or "Not Started").strip()
+    status = next((s for s in STATUSES if s.lower() == status.lower()), None)
+    if status is None:
+        raise ValueError(f"status must be one of {', '.join(STATUSES)}")
+
+    return {
+        "title": title,
+        "description": str(record.get("description") or "").strip(),
+        "deadline": deadline,
+        "portfolio_id": portfolio_id,
+        "priority": priority,
+        "status": status,
+    }
+
+def _portfolio_id(value: str, portfolios):
+    if value.isdigit() and int(value) in portfolios:
+        return int(value)
+    return portfolios.find(value)
+
+def validate_file(data: bytes, filename: str, portfolios, default_portfolio_id: int = None):
+    """
+    Validates every record of an uploaded file while reading it.
+    Returns (rows, errors): the Task column values of the valid records, and "line N: problem" messages.
+    Reading stops early once MAX_IMPORT_ERRORS problems were found or MAX_IMPORT_ROWS was exceeded.
+    """
+    rows, errors = [], []
+    try:
+        for line_no, record in read_records(data, filename):
+            if len(rows) >= MAX_IMPORT_ROWS:
+                errors.append(f"more than {MAX_IMPORT_ROWS} tasks; split the file")
+                break
+            try:
+                rows.append(validate_record(record, portfolios, default_portfolio_id))
+            except ValueError as e:
+                errors.append(f"line {line_no}: {e}")
+                if len(errors) >= MAX_IMPORT_ERRORS:
+                    break
+    except (ValueError, csv.Error, UnicodeDecodeError) as e:
+        errors.append(str(e))
+    return rows, errors
@@ -0,0 +1,108 @@
+# utils/task_lookup.py
+import bisect
+import heapq
+from utils.search_index import tokenize
+
+# A typed word is matched as a prefix of at most this many title words
+MAX_EXPANSIONS = 200
+
+class TaskPrefixIndex:
+    """
+    In-memory lookup of tasks by id prefix or title word prefixes, for slash command autocomplete.
+    Loaded once at startup and then kept current by the task events, so suggestions never touch the database.
+    """
+    def __init__(self):
+        self._ids = []         # sorted task ids
+        self._labels = {}      # task_id -> (title, status)
+        self._postings = {}    # title word -> set of task ids
+        self._words = []       # sorted title words, for prefix lookups
+
+    def __len__(self):
+        return len(self._labels)
+
+    def load(self, rows):
+        """Adds (task_id, title, status) rows, e.g. from crud.iter_task_labels."""
+        for task_id, title, status in rows:
+            self._labels[task_id] = (title or "", status)
+            for word in set(tokenize(title)):
+                self._postings.setdefault(word, set()).add(task_id)
+        self._ids = sorted(self._labels)
+        self._words = sorted(self._postings)
+
+    def update(self, task):
+        """Adds a created task or refreshes the title and status of an edited one."""
+        task_id = task.task_id
+        old = self._labels.get(task_id)
+        if old is None:
+            bisect.insort(self._ids, task_id)
+        else:
+            self._unindex_title(task_id, old[0])
+        self._labels[task_id] = (task.title or "", task.status)
+        for word in set(tokenize(task.title)):
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = set()
+                bisect.insort(self._words, word)
+            postings.add(task_id)
+
+    def remove(self, task_id: int):
+        old = self._labels.pop(task_id, None)
+        if old is None:
+            return
+        del self._ids[bisect.bisect_left(self._ids, task_id)]
+        self._unindex_title(task_id, old[0])
+
+    def _unindex_title(self, task_id: int, title: str):
+        for word in set(tokenize(title)):
+            postings = self._postings.get(word)
+            if postings is None:
+                continue
+            postings.discard(task_id)
+            if not postings:
+                del self._postings[word]
+                del self._words[bisect.bisect_left(self._words, word)]
+
+    def label(self, task_id: int):
+        """Returns (title, status) of an indexed task, or None."""
+        return self._labels.get(task_id)
+
+    def by_id_prefix(self, prefix: str, limit: int) -> list:
+        """Ids whose decimal form starts with prefix, shortest first: 12, then 120-129, then 1200-1299, ..."""
+        if not prefix.isdigit() or prefix.startswith("0") or not self._ids:
+            return []
+        base = int(prefix)
+        largest = self._ids[-1]
+        found = []
+        scale = 1
+        while base * scale <= largest and len(found) < limit:
+            start = bisect.bisect_left(self._ids, base * scale)
+            end = bisect.bisect_left(self._ids, (base + 1) * scale)
+            found.extend(self._ids[start:min(end, start + limit - len(found))])
+            scale *= 10
+        return found
+
+    def by_title(self, query: str, limit: int) -> list:
+        """Newest tasks whose title has a word starting with each word of the query."""
+        matches = None
+        for term in sorted(set(tokenize(query)), key=len, reverse=True):
+            start = bisect.bisect_left(self._words, term)
+            term_matches = set()
+            for word in self._words[start:start + MAX_EXPANSIONS]:
+                if not word.startswith(term):
+                    break
+                term_matches |= self._postings[word]
+            matches = term_matches if matches is None else matches & term_matches
+            if not matches:
+                return []
+        return heapq.nlargest(limit, matches) if matches else []
+
+    def suggest(self, current: str, limit: int = 25) -> list:
+        """Task ids to offer for what the user has typed so far: id matches first, then title matches."""
+        current = current.strip().lstrip("#")
+        if not current:
+            return self._ids[-limit:][::-1]
+        found = self.by_id_prefix(current, limit) if current.isdigit() else []
+        if len(found) < limit:
+            seen = set(found)
+            found.extend(task_id for task_id in self.by_title(current, limit) if task_id not in seen)
+        return found[:limit]
@@ -0,0 +1,204 @@
+# utils/upload_worker.py
+import asyncio
+import json
+import mimetypes
+import os
+import uuid
+from config import SUPABASE_URL, SUPABASE_KEY, RECORDINGS_SPOOL_DIR, RECORDINGS_BUCKET
+from utils.storage import SupabaseClient
+
+# Number of uploads that run at the same time
+UPLOAD_CONCURRENCY = 2
+# Retry delays for failed jobs: doubled after every attempt, capped
+RETRY_BASE_DELAY = 5
+RETRY_MAX_DELAY = 15 * 60
+# Jobs that failed this many times are set aside (about 2 hours of retries)
+MAX_ATTEMPTS = 12
+# Recordings found in the spool without a job (e.g. the segment being written when the bot crashed) are uploaded here
+RECOVERED_FOLDER = "recovered"
+
+def write_json_atomic(path: str, data: dict):
+    """Writes JSON through a temporary file so a crash never leaves a half-written file behind."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def remove_file(path: str):
+    """Deletes a file that may already be gone."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+class UploadWorker:
+    """
+    Uploads finished recordings in the background.
+    Each job is a file in the spool directory plus a JSON description next to it; the job is only
+    deleted once the upload and its table row have succeeded. Failed jobs are retried with backoff,
+    and jobs left over from a previous run are picked up again on start(). Job files that cannot be
+    read, or that failed MAX_ATTEMPTS times, are renamed to .job.json.bad and left for inspection.
+    """
+    def __init__(self, bot, spool_dir: str = RECORDINGS_SPOOL_DIR):
+        self.bot = bot
+        self.spool_dir = spool_dir
+        self.client = None
+        self.queue = asyncio.Queue()
+        self._tasks = []
+        self._retry_handles = set()
+
+    def spool_path(self, suffix: str) -> str:
+        """Returns a fresh path inside the spool directory, for writing a recording that will be submitted."""
+        os.makedirs(self.spool_dir, exist_ok=True)
+        return os.path.join(self.spool_dir, f"{uuid.uuid4().hex}{suffix}")
+
+    async def start(self):
+        os.makedirs(self.spool_dir, exist_ok=True)
+        names = sorted(name for name in os.listdir(self.spool_dir) if os.path.isfile(os.path.join(self.spool_dir, name)))
+        # Resume jobs that were not finished before the last shutdown
+        for name in names:
+            if name.endswith(".job.json"):
+                self.queue.put_nowait(os.path.join(self.spool_dir, name))
+        self._recover_orphans(names)
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(UPLOAD_CONCURRENCY)]
+
+    async def stop(self):
+        for handle in self._retry_handles:
+            handle.cancel()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.client is not None:
+            await self.client.close()
+
+    def _recover_orphans(self, names: list):
+        """
+        Submits spool files that have no job, which a crash in the middle of a recording leaves behind.
+        They are uploaded under RECOVERED_FOLDER, since the meeting they belong to is not known.
+        """
+        jobs = {name[:-len(".job.json")] for name in names if name.endswith(".job.json")}
+        jobs |= {name[:-len(".job.json.bad")] for name in names if name.endswith(".job.json.bad")}
+        for name in names:
+            path = os.path.join(self.spool_dir, name)
+            if name.endswith(".tmp"):
+                # An interrupted write_json_atomic; the job it was replacing is still intact
+                os.remove(path)
+                continue
+            if ".job.json" in name or os.path.splitext(name)[0] in jobs:
+                continue
+            if os.path.getsize(path) == 0:
+                os.remove(path)
+                continue
+            print(f"Recovering {name} from the spool without an upload job")
+            content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            self.submit(path, RECORDINGS_BUCKET, f"{RECOVERED_FOLDER}/{name}", content_type)
+
+    def pending(self) -> int:
+        return self.queue.qsize() + len(self._retry_handles)
+
+    @staticmethod
+    def job_path(file_path: str) -> str:
+        """The job description written next to a spool file by submit()."""
+        return f"{os.path.splitext(file_path)[0]}.job.json"
+
+    def submit(self, file_path: str, bucket: str, object_path: str, content_type: str,
+               table: str = None, row: dict = None, channel_id: int = None, row_key: str = None) -> str:
+        """
+        Persists an upload job for a file in the spool directory and queues it.
+        If table and row are given, the row is inserted after the file has been uploaded; with row_key
+        (a unique column of the table) the insert is idempotent.
+        """
+        job_path = self.job_path(file_path)
+        write_json_atomic(job_path, {
+            "file_path": file_path,
+            "bucket": bucket,
+            "object_path": object_path,
+            "content_type": content_type,
+            "table": table,
+            "row": row,
+            "row_key": row_key,
+            "channel_id": channel_id,
+            "uploaded": False,
+            "row_inserted": False,
+            "attempts": 0,
+        })
+        self.queue.put_nowait(job_path)
+        return job_path
+
+    async def _run(self):
+        while True:
+            job_path = await self.queue.get()
+            try:
+                await self._process(job_path)
+            except Exception as e:
+                # Keep the worker alive for the other jobs
+                print(f"Error processing upload job {job_path}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _process(self, job_path: str):
+        try:
+            with open(job_path, encoding="utf-8") as f:
+                job = json.load(f)
+            missing = not job["uploaded"] and not os.path.exists(job["file_path"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self._set_aside(job_path, f"unreadable job file: {e}")
+            return
+        if missing:
+            self._set_aside(job_path, f"{job['file_path']} is missing")
+            return
+        if self.client is None:
+            # Created on the first job, so a bot that never records never opens a Storage session
+            self.client = SupabaseClient(SUPABASE_URL, SUPABASE_KEY)
+        try:
+            if not job["uploaded"]:
+                await self.client.upload_file(job["bucket"], job["object_path"], job["file_path"], job["content_type"])
+                # Remember the finished upload so a retry only redoes the row insert
+                job["uploaded"] = True
+                write_json_atomic(job_path, job)
+            if job.get("table") and not job.get("row_inserted"):
+                await self.client.insert_row(job["table"], job["row"], on_conflict=job.get("row_key"))
+                # Remember the insert so a crash before the cleanup does not insert the row twice
+                job["row_inserted"] = True
+                write_json_atomic(job_path, job)
+        except Exception as e:
+            job["attempts"] += 1
+            job["last_error"] = str(e)
+            write_json_atomic(job_path, job)
+            if job["attempts"] >= MAX_ATTEMPTS:
+                self._set_aside(job_path, f"failed {job['attempts']} times: {e}")
+                await self._notify(job, f"Recording `{job['object_path']}` could not be uploaded and was kept on the bot's disk.")
+                return
+            delay = min(RETRY_BASE_DELAY * 2 ** (job["attempts"] - 1), RETRY_MAX_DELAY)
+            print(f"Upload of {job['object_path']} failed (attempt {job['attempts']}), retrying in {delay}s: {e}")
+            self._retry_later(job_path, delay)
+            return
+
+        remove_file(job["file_path"])
+        remove_file(job_path)
+        await self._notify(job, f"Recording uploaded to the '{job['bucket']}' bucket as `{job['object_path']}`.")
+
+    def _set_aside(self, job_path: str, reason: str):
+        """Renames a job that can never succeed so it is not resumed again, keeping it for inspection."""
+        print(f"Setting aside upload job {job_path}: {reason}")
+        try:
+            os.replace(job_path, f"{job_path}.bad")
+        except FileNotFoundError:
+            pass
+
+    def _retry_later(self, job_path: str, delay: float):
+        def requeue():
+            self._retry_handles.discard(handle)
+            self.queue.put_nowait(job_path)
+        handle = asyncio.get_running_loop().call_later(delay, requeue)
+        self._retry_handles.add(handle)
+
+    async def _notify(self, job: dict, message: str):
+        channel = self.bot.get_channel(job["channel_id"]) if job.get("channel_id") else None
+        if channel:
+            try:
+                await channel.send(message)
+            except Exception as e:
+                print(f"Error sending upload notification: {e}")